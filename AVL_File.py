@@ -1,20 +1,32 @@
 import struct
 import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool, operation_name
+from Record_Codec import RecordCodec, LazyText
 
 POINTER_FORMAT= 'i'
 POINTER_SIZE=struct.calcsize(POINTER_FORMAT)
+POINTER_CODEC=struct.Struct(POINTER_FORMAT)
+FREE_SLOT=-2 # valor de `right` en las posiciones liberadas, cuyo `left` apunta a la siguiente libre
 
 class Venta:
 
     FORMAT = 'i30sif10si'+2*POINTER_FORMAT  
     SIZE = struct.calcsize(FORMAT)
+    CODEC = RecordCodec(FORMAT)
+
+    # nombre y fechaVenta se decodifican recien al accederlos (ver LazyText)
+    __slots__ = ('id','_nombre','cantidad','precio','_fechaVenta','balanceFactor','left','right','index')
+    nombre = LazyText(30, 'latin-1')
+    fechaVenta = LazyText(10, 'utf-8')
 
     def __init__(self, id, nombre, cantidad, precio, fechaVenta, balanceFactor=0, left=-1,right=-1):
         self.id = id
-        self.nombre = nombre[:30].ljust(30)
+        self.nombre = nombre
         self.cantidad = cantidad
         self.precio = precio
-        self.fechaVenta = fechaVenta[:10].ljust(10)
+        self.fechaVenta = fechaVenta
         self.balanceFactor=balanceFactor
         self.left = left
         self.right=right
@@ -33,49 +45,141 @@ class Venta:
         
 class BaseFile:
     COUNT_REGISTER_FORMAT = 'i'
-    HEADER_FORMAT = POINTER_FORMAT+COUNT_REGISTER_FORMAT
+    VERSION_FORMAT = 'i'
+    # raiz, posiciones usadas, primera posicion libre, version (cuantas veces se escribio la cabecera)
+    HEADER_FORMAT = POINTER_FORMAT+COUNT_REGISTER_FORMAT+POINTER_FORMAT+VERSION_FORMAT
+    HEADER_CODEC = struct.Struct(HEADER_FORMAT)
+    VERSION_CODEC = struct.Struct(VERSION_FORMAT)
 
 
     COUNT_REGISTER_SIZE=struct.calcsize(COUNT_REGISTER_FORMAT)
     HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    COUNT_REGISTER_CODEC = struct.Struct(COUNT_REGISTER_FORMAT)
+    FREE_HEAD_OFFSET = POINTER_SIZE+COUNT_REGISTER_SIZE
+    VERSION_OFFSET = FREE_HEAD_OFFSET+POINTER_SIZE
 
-    def __init__(self, filename, ruta=None):
+    def __init__(self, filename, ruta=None, nuevo=True, pool=None):
         self.filename = filename
-        self.createFile(ruta)
+        self.pool = pool if pool!=None else buffer_pool  # toda la E/S de registros pasa por el buffer pool
+        self.session = False
+        self.depth = 0
+        self.header = None  # cabecera en memoria [raiz, posiciones usadas, primera libre, version]
+        self.headerGeneration = None
+        self.headerDirty = False
+        self.headerChecked = False  # ya se comparo con la version del archivo en esta operacion
+        self.batch = None  # nodos leidos o modificados durante insert_many (posicion -> Venta)
+        self.batchDirty = None
+        if nuevo or not os.path.exists(filename):
+            self.createFile(ruta)
+
+    @classmethod
+    def open(cls, filename, ruta=None, pool=None):
+        # Sesion: el archivo queda abierto en el buffer pool para muchas operaciones, se usa con `with`.
+        # Si se da una ruta se recrea el archivo desde el CSV, si no se abre el archivo existente
+        tree = cls(filename, ruta, nuevo=ruta!=None, pool=pool)
+        tree.session = True
+        return tree
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self.writeHeader()
+        self.pool.flush(self.filename)
+
+    def close(self):
+        self.writeHeader()
+        self.session = False
+        self.pool.close(self.filename)
+
+    def beginOperation(self, name=None):
+        self.depth += 1
+        self.pool.begin(operation_name(self, name))  # limite de la operacion logica para el log
+
+    def endOperation(self):
+        # Al terminar la operacion mas externa la cabecera modificada vuelve a su pagina (otra instancia
+        # sobre el mismo archivo la ve y, con log, entra en el mismo commit que los nodos). Fuera de una
+        # sesion ademas se escriben las paginas modificadas y se cierra el archivo; dentro de una sesion
+        # se vuelca en flush()/close()
+        self.depth -= 1
+        if self.depth==0:
+            self.writeHeader()
+            self.headerChecked=False
+            if not self.session:
+                self.pool.release(self.filename)
+        self.pool.end()
+
+    @contextmanager
+    def operation(self, name=None):
+        self.beginOperation(name)
+        try:
+            yield
+        finally:
+            self.endOperation()
+
+    @contextmanager
+    def pause(self, name=None):
+        # Un cursor entrega cada registro con la operacion cerrada y la vuelve a abrir al reanudarse:
+        # mientras esta suspendido no retiene la cabecera, el archivo ni el commit del log
+        self.endOperation()
+        try:
+            yield
+        finally:
+            self.beginOperation(name)
+
+    def nextVersion(self):
+        # Version para el archivo reescrito: sigue a la que tenia, asi otro proceso nota el cambio
+        if not os.path.exists(self.filename):
+            return 0
+        with open(self.filename, "rb") as file:
+            data=file.read(BaseFile.HEADER_SIZE)
+        return (BaseFile.HEADER_CODEC.unpack(data)[3]+1)&0x7fffffff if len(data)==BaseFile.HEADER_SIZE else 0
 
     def createFile(self,ruta):
+        self.pool.invalidate(self.filename)
+        version=self.nextVersion()
         with open(self.filename, "wb") as file:
             file.write(struct.pack(POINTER_FORMAT,-1))
             file.write(struct.pack(BaseFile.COUNT_REGISTER_FORMAT,0))
+            file.write(struct.pack(POINTER_FORMAT,-1))
+            file.write(struct.pack(BaseFile.VERSION_FORMAT,version))
             
         if ruta!=None:
-            with open(ruta, "r") as archivo:
-                next(archivo)
-                for linea in archivo:
-                    id,nombre,cantidad,precio,fechaVenta= tuple(linea.strip().split(","))  # Elimina saltos de línea y separa por comas
-                    venta=Venta(int(id),nombre,int(cantidad),float(precio),fechaVenta)
-                    self.insert(venta)
-            
+            self.bulk_load(self.readCsv(ruta))
+
+    def readCsv(self,ruta):
+        with open(ruta, "r") as archivo:
+            next(archivo)
+            for linea in archivo:
+                id,nombre,cantidad,precio,fechaVenta= tuple(linea.strip().split(","))  # Elimina saltos de línea y separa por comas
+                yield Venta(int(id),nombre,int(cantidad),float(precio),fechaVenta)
+
     def packRecord(self, record):
-        return struct.pack(Venta.FORMAT,
+        return Venta.CODEC.pack(
             record.id,
-            record.nombre.encode('latin-1'),
+            Venta.nombre.encoded(record),
             record.cantidad,
             record.precio,
-            record.fechaVenta.encode(),
+            Venta.fechaVenta.encoded(record),
             record.balanceFactor,
             record.left,
             record.right
         )
 
     def unpackRecord(self, data):
-        id, nombre, cantidad, precio, fechaVenta,balanceFactor, left,right= struct.unpack(Venta.FORMAT, data)
+        return self.buildRecord(Venta.CODEC.unpack(data))
+
+    def buildRecord(self, fields):
+        id, nombre, cantidad, precio, fechaVenta,balanceFactor, left,right= fields
         return Venta(
             id,
-            nombre.decode('latin-1').strip(),
+            nombre,  # bytes crudos, se decodifican al primer acceso
             cantidad,
             precio,
-            fechaVenta.decode().strip(),
+            fechaVenta,
             balanceFactor,
             left,
             right,
@@ -84,72 +188,163 @@ class BaseFile:
     def getAllRecords(self):
         # Devuelve todos los registros válidos.
         records = []
-        with open(self.filename, "rb") as file:
-            index = 0
-            while True:
-                file.seek(BaseFile.HEADER_SIZE+index*Venta.SIZE)
-                data = file.read(Venta.SIZE)
-                if not data:
-                    break
-                index += 1
-
-                record = self.unpackRecord(data)
-                records.append(record)
+        with self.operation('getAllRecords'):
+            for index in range(self.getCountRegister()):
+                record=self.getRecord(index)
+                if record.right!=FREE_SLOT:
+                    records.append(record)
         return records
     
     def getRecord(self,index):
         if index==-1:
             return None
+        if self.batch is not None:
+            record=self.batch.get(index)
+            if record is not None:
+                return record
 
-        self.file.seek(BaseFile.HEADER_SIZE+index*Venta.SIZE)
-        record=self.unpackRecord(self.file.read(Venta.SIZE))
+        # unpack_from sobre la pagina en cache o sobre el mapa (modo mmap), sin copiar los bytes del registro
+        record=self.buildRecord(self.pool.unpack_from(self.filename,Venta.CODEC,BaseFile.HEADER_SIZE+index*Venta.SIZE))
         record.index=index
+        if self.batch is not None:
+            self.batch[index]=record
         return record
         
     def setRecord(self,record):
-        self.file.seek(BaseFile.HEADER_SIZE+record.index*Venta.SIZE)
-        self.file.write(self.packRecord(record))
+        if self.batch is not None:
+            # En un lote el nodo queda modificado en memoria y se escribe una sola vez al final
+            self.batch[record.index]=record
+            self.batchDirty.add(record.index)
+            return
+        self.pool.write(self.filename,BaseFile.HEADER_SIZE+record.index*Venta.SIZE,self.packRecord(record))
         
     def appendRecord(self,record):
-        self.file.seek(0,os.SEEK_END)
-        self.file.write(self.packRecord(record))
-        record.index=self.getCountRegister()
-        self.incrementCountRegister()
+        # Se reutiliza la primera posicion libre; si no hay, se agrega al final
+        free=self.getFreeHead()
+        if free!=-1:
+            record.index=free
+            self.setFreeHead(self.getRecord(free).left)
+        else:
+            record.index=self.getCountRegister()
+            self.incrementCountRegister()
+        self.setRecord(record)
         return record
+
+    def freeRecord(self,record):
+        # La ultima posicion se descuenta del conteo; las demas pasan a la lista de libres
+        if record.index==self.getCountRegister()-1:
+            self.decrementCountRegister()
+        else:
+            record.left=self.getFreeHead()
+            record.right=FREE_SLOT
+            self.setRecord(record)
+            self.setFreeHead(record.index)
     
+    def getHeader(self):
+        # La cabecera queda en memoria y se valida una vez por operacion. Primero el pool compara la
+        # version del disco con la que vio: si la cambio otro proceso descarta las paginas del archivo.
+        # Despues se vuelve a leer si cambio la version de la pagina (la escribio otra instancia) o la
+        # generacion del archivo en el pool, que cambia cuando se descartan sus paginas (archivo
+        # reescrito por bulk_load/createFile, otro proceso, o Concurrent_File)
+        if not self.headerChecked:
+            self.pool.validate(self.filename,BaseFile.VERSION_OFFSET,BaseFile.VERSION_CODEC.size)
+            generation=self.pool.generation(self.filename)
+            if self.header is None or self.headerGeneration!=generation or \
+                    self.header[3]!=self.pool.unpack_from(self.filename,BaseFile.VERSION_CODEC,BaseFile.VERSION_OFFSET)[0]:
+                self.header=list(self.pool.unpack_from(self.filename,BaseFile.HEADER_CODEC,0))
+                self.headerGeneration=generation
+            self.headerDirty=False
+            self.headerChecked=self.depth>0
+        return self.header
+
+    def setHeader(self,field,value):
+        self.getHeader()[field]=value
+        self.headerDirty=True
+
+    def writeHeader(self):
+        if self.headerDirty and self.headerGeneration==self.pool.generation(self.filename):
+            self.header[3]=(self.header[3]+1)&0x7fffffff
+            self.pool.write(self.filename,0,BaseFile.HEADER_CODEC.pack(*self.header))
+        self.headerDirty=False
+
     def getIndexHead(self):
-        with open(self.filename, "rb+") as file:
-            file.seek(0)
-            return struct.unpack(POINTER_FORMAT,file.read(POINTER_SIZE))[0]
+        if self.depth:
+            return self.getHeader()[0]
+        with self.operation('getIndexHead'):
+            return self.getHeader()[0]
             
     def setIndexHead(self,value):
-        self.file.seek(0)
-        self.file.write(struct.pack(POINTER_FORMAT,value))
+        self.setHeader(0,value)
         
     def getCountRegister(self):
-        self.file.seek(POINTER_SIZE)
-        return struct.unpack(BaseFile.COUNT_REGISTER_FORMAT,self.file.read(BaseFile.COUNT_REGISTER_SIZE))[0]
+        if self.depth:
+            return self.getHeader()[1]
+        with self.operation('getCountRegister'):
+            return self.getHeader()[1]
+
+    def setCountRegister(self,count):
+        self.setHeader(1,count)
+
+    def getFreeHead(self):
+        return self.getHeader()[2]
+
+    def setFreeHead(self,value):
+        self.setHeader(2,value)
 
     def incrementCountRegister(self):
-        count=self.getCountRegister()
-        self.file.seek(POINTER_SIZE)
-        self.file.write(struct.pack(BaseFile.COUNT_REGISTER_FORMAT,count+1))
+        self.setCountRegister(self.getCountRegister()+1)
 
     def decrementCountRegister(self):
-        count=self.getCountRegister()
-        self.file.seek(POINTER_SIZE)
-        self.file.write(struct.pack(BaseFile.COUNT_REGISTER_FORMAT,count-1))
+        self.setCountRegister(self.getCountRegister()-1)
 
 # En todos se evito metodos recursivos, con metodos iterativos disminuimos la sobrecarga en el stack en la memoria principal 
 
 class AvlFile(BaseFile):
 
+    def bulk_load(self, records):
+        # Reemplaza el contenido del archivo por un arbol perfectamente balanceado construido desde la entrada ordenada.
+        # El registro de rango i se guarda en la posicion i, y los hijos de cada nodo son los centros de sus mitades,
+        # asi el archivo se escribe en una sola pasada y sin rotaciones
+        records = sorted(records, key=lambda record: record.id)
+        unique = []
+        for record in records:
+            if unique and unique[-1].id == record.id:
+                print(f"Error: Ya existe un registro con ID : {record.id}")
+                continue
+            unique.append(record)
+        records = unique
+        n = len(records)
+
+        def middle(lo, hi):
+            return (lo+hi)//2 if lo<=hi else -1
+
+        stack = [(0, n-1)] if n else []
+        while stack:
+            lo, hi = stack.pop()
+            mid = middle(lo, hi)
+            record = records[mid]
+            record.left = middle(lo, mid-1)
+            record.right = middle(mid+1, hi)
+            # La altura de un rango de m nodos partido por el centro es m.bit_length()
+            record.balanceFactor = (hi-mid).bit_length()-(mid-lo).bit_length()
+            if record.left!=-1: stack.append((lo, mid-1))
+            if record.right!=-1: stack.append((mid+1, hi))
+
+        self.pool.invalidate(self.filename)
+        version=self.nextVersion()
+        with open(self.filename, "wb") as file:
+            file.write(struct.pack(POINTER_FORMAT, middle(0, n-1)))
+            file.write(struct.pack(BaseFile.COUNT_REGISTER_FORMAT, n))
+            file.write(struct.pack(POINTER_FORMAT, -1))
+            file.write(struct.pack(BaseFile.VERSION_FORMAT, version))
+            for record in records:
+                file.write(self.packRecord(record))
+
     def insert(self, record):
-        with open(self.filename, "rb+") as file:
-            self.file=file
+        with self.operation('insert'):
             if (self.getIndexHead()==-1):
                 self.appendRecord(record)
-                self.setIndexHead(0)
+                self.setIndexHead(record.index)
             else:
                 T=None # Siempre apunta al padre de S
                 S=self.getRecord(self.getIndexHead()) # S apuntara posible nodo que necesite balanceo
@@ -165,7 +360,7 @@ class AvlFile(BaseFile):
                         childSide=1
                     else:
                         print(f"Error: Ya existe un registro con ID : {record.id}")
-                        return
+                        return False
                     
                     if (Q==None): break   
                     if(Q.balanceFactor!=0): T=P;S=Q
@@ -246,72 +441,131 @@ class AvlFile(BaseFile):
                         else:
                             T.left=P.index
                         self.setRecord(T) 
+            return True
     
     
+    def insert_many(self, records):
+        # Inserta un lote ordenado por id con el mismo algoritmo que insert (incluidas las rotaciones),
+        # asi el arbol queda igual que insertando el lote ordenado uno por uno. Los nodos que se leen
+        # quedan en memoria durante el lote: las claves consecutivas bajan por el mismo camino superior
+        # sin volver a leerlo, y cada nodo modificado se escribe una sola vez al final.
+        # Devuelve cuantos registros se insertaron (los ids repetidos se informan y se omiten)
+        records=sorted(records,key=lambda record: record.id)
+        inserted=0
+        with self.operation('insert_many'):
+            self.batch={}
+            self.batchDirty=set()
+            try:
+                for record in records:
+                    if self.insert(record):
+                        inserted+=1
+            finally:
+                batch,dirty=self.batch,self.batchDirty
+                self.batch=self.batchDirty=None
+                for index in sorted(dirty):
+                    self.setRecord(batch[index])
+        return inserted
+
     def remove(self, key):
-        with open(self.filename, "rb+") as file:
-            self.file=file
+        with self.operation('remove'):
             if (self.getIndexHead()==-1):
                 print(f"Error: El archivo no tiene registros")
+                return False
+
+            path=[] # (nodo, lado por el que se bajo), desde la raiz
+            P=self.getRecord(self.getIndexHead())
+
+            # Etapa 1: Busqueda del nodo a eliminar
+            while P.id!=key:
+                childSide=-1 if key<P.id else 1
+                path.append((P,childSide))
+                P=self.getRecord(P.getIndexChild(childSide))
+                if (P==None): print(f"Error: No existe un registro con ID : {key}"); return False
+
+            # Etapa 2: Con dos hijos, el sucesor (minimo del subarbol derecho) ocupa su lugar: se copian
+            # sus datos en el nodo y se elimina el sucesor, que tiene a lo sumo un hijo derecho
+            if (P.left!=-1 and P.right!=-1):
+                path.append((P,1))
+                X=self.getRecord(P.right)
+                while X.left!=-1:
+                    path.append((X,-1))
+                    X=self.getRecord(X.left)
+                P.id,P.nombre,P.cantidad,P.precio,P.fechaVenta=X.id,X.nombre,X.cantidad,X.precio,X.fechaVenta
+                self.setRecord(P)
+                P=X
+
+            child=P.left if P.left!=-1 else P.right
+            if path:
+                O,childSide=path[-1]
+                O.setIndexChild(childSide,child)
+                self.setRecord(O)
             else:
-                T=None # Siempre apunta al padre de S
-                S=self.getRecord(self.getIndexHead()) # S apuntara posible nodo que necesite balanceo
+                self.setIndexHead(child)
+            self.freeRecord(P)
+
+            # Etapa 3: Retroceso hacia la raiz. El subarbol del lado `childSide` de N perdio un nivel
+            for i in range(len(path)-1,-1,-1):
+                N,childSide=path[i]
+                if (N.balanceFactor==childSide): # estaba cargado hacia ese lado: queda balanceado y mas bajo
+                    N.balanceFactor=0
+                    self.setRecord(N)
+                    continue
+                if (N.balanceFactor==0): # la altura no cambia, se termina
+                    N.balanceFactor=-childSide
+                    self.setRecord(N)
+                    break
 
-                O=None
-                P=S # P sera el puntero que se desaplazara hacia abajo
-                
-                # Etapa 1: Busqueda de posicion a insertar nodo
-                while True:
-                    if (key<P.id):
-                        Q=self.getRecord(P.left)
-                        childSide=-1
-                    elif (key>P.id):
-                        Q=self.getRecord(P.right)
-                        childSide=1
+                # Desbalanceado hacia el otro lado: rotacion con el hijo Z de ese lado
+                side=-childSide
+                Z=self.getRecord(N.getIndexChild(side))
+                if (Z.balanceFactor!=-side): # Se requiere de rotacion simple
+                    N.setIndexChild(side,Z.getIndexChild(-side))
+                    Z.setIndexChild(-side,N.index)
+                    if (Z.balanceFactor==0): # la altura del subarbol no cambia
+                        N.balanceFactor=side
+                        Z.balanceFactor=-side
                     else:
-                        break
-                    
-                    if (Q==None): print(f"Error: No existe un registro con ID : {key}"); return
-
-                    if(Q.balanceFactor!=0): T=P;S=Q
-                    O=P
-                    P=Q  
-
-                # Etapa 2: Eliminacion de nodo
-
-                if (P.left==-1 and P.right==-1):
-                    O.setIndexChild(childSide,-1)
-                elif (P.left!=-1 and P.right==-1):
-                    P=self.getRecord(P.left)
-                    O.setIndexChild(childSide,P.index)
+                        N.balanceFactor=0
+                        Z.balanceFactor=0
+                    self.setRecord(N)
+                    self.setRecord(Z)
+                    root=Z
+                else: # Se requiere de rotacion doble
+                    Y=self.getRecord(Z.getIndexChild(-side))
+                    Z.setIndexChild(-side,Y.getIndexChild(side))
+                    Y.setIndexChild(side,Z.index)
+                    N.setIndexChild(side,Y.getIndexChild(-side))
+                    Y.setIndexChild(-side,N.index)
+                    if (Y.balanceFactor==side):
+                        N.balanceFactor=-side
+                        Z.balanceFactor=0
+                    elif (Y.balanceFactor==0):
+                        N.balanceFactor=0
+                        Z.balanceFactor=0
+                    else:
+                        N.balanceFactor=0
+                        Z.balanceFactor=side
+                    Y.balanceFactor=0
+                    self.setRecord(N)
+                    self.setRecord(Z)
+                    self.setRecord(Y)
+                    root=Y
+
+                # Etapa 4: Actualizacion de pointer a nodo padre
+                if i==0:
+                    self.setIndexHead(root.index)
                 else:
-                    Pini=P
-                    O2=P
-                    P=self.getRecord(P.right)
-                    childSide2=1
-
-                    while(P.left!=-1):
-                        O2=P
-                        P=self.getRecord(P.left)
-                        childSide2=-1
-
-                    O2.setIndexChild(childSide2,P.right)
-                    P.left=Pini.left
-                    P.right=Pini.right
+                    O,parentSide=path[i-1]
+                    O.setIndexChild(parentSide,root.index)
+                    self.setRecord(O)
+                if (root.balanceFactor!=0): break # rotacion simple con Z balanceado: la altura no cambio
+            return True
 
-                    if O==None:
-                        self.setIndexHead(P.index)
-                    else: 
-                        O.setIndexChild(childSide,P.index)
-
-                    self.setRecord(O2)
-                    self.setRecord(P)
-                    
-                if O!=None: self.setRecord(O)
-              
     def search(self, key):
-        with open(self.filename, "rb+") as file:
-            self.file=file
+        with self.operation('search'):
+            if (self.getIndexHead()==-1):
+                print(f"Error: No existe un registro con ID : {key}")
+                return None
             P=self.getRecord(self.getIndexHead()) # P sera el puntero que se desaplazara hacia abajo
             while True:
                 if (key<P.id):
@@ -325,14 +579,41 @@ class AvlFile(BaseFile):
                     break
                 P=Q 
     
+    def search_many(self, keys):
+        # Busca varios ids en un solo descenso: con las claves ordenadas cada nodo se lee una vez y
+        # reparte las claves entre sus dos subarboles, asi los caminos comparten su parte superior.
+        # Devuelve los registros en el orden de `keys` (None para los que no existen)
+        keys=list(keys)
+        ordered=sorted(set(keys))
+        found={}
+        with self.operation('search_many'):
+            stack=[(self.getIndexHead(),0,len(ordered))] if ordered else []
+            while stack:
+                index,lo,hi=stack.pop() # ordered[lo:hi] son las claves que pueden estar en este subarbol
+                P=self.getRecord(index)
+                if P==None: continue
+                mid=bisect_left(ordered,P.id,lo,hi)
+                right=mid
+                if mid<hi and ordered[mid]==P.id:
+                    found[P.id]=P
+                    right=mid+1
+                if lo<mid: stack.append((P.left,lo,mid))
+                if right<hi: stack.append((P.right,right,hi))
+        return [found.get(key) for key in keys]
+
     def rangeSearch(self, init_key, end_key):
-        with open(self.filename, "rb+") as file:
-            self.file=file
-            records=[]
+        with self.operation('rangeSearch'):  # el cursor no cierra el archivo entre registros
+            return list(self.cursor(init_key, end_key))
+
+    def cursor(self, init_key=-2**31, end_key=2**31-1, limit=None):
+        # Generador de los registros con init_key <= id <= end_key en orden de id (como mucho `limit`).
+        # Lee los nodos a medida que se piden; para continuar despues del ultimo registro recibido
+        # se abre otro cursor desde ultimo.id+1
+        with self.operation('cursor'):
             stackIndex = []
             record = self.getRecord(self.getIndexHead())
 
-            while stackIndex or record:
+            while (stackIndex or record) and limit!=0:
                 while record:
                     stackIndex.append(record.index)
                     if record.id > init_key:
@@ -343,39 +624,49 @@ class AvlFile(BaseFile):
                 record = self.getRecord(stackIndex.pop())
 
                 if init_key <= record.id <= end_key:
-                    records.append(record)
+                    with self.pause('cursor'):
+                        yield record
+                    if limit!=None: limit-=1
 
                 if record.id < end_key:
                     record = self.getRecord(record.right)
                 else:  # Si end_key es mayor entonces se descarta todo el subarbol derecho, y terminamos ya que estamos inorder
                     record = None
 
-            return records
 
 
+if __name__ == "__main__":
+    with AvlFile.open("ventas.dat","sales_dataset_prueba.csv") as avlFile:
+        ventas=avlFile.getAllRecords()
+        print("Operacion Insert:\nHeader Pointer: ",avlFile.getIndexHead())
+        for venta in ventas:
+            print(venta)
 
-avlFile = AvlFile("ventas.dat","sales_dataset_prueba.csv")
+        print()
 
-ventas=avlFile.getAllRecords()
-print("Operacion Insert:\nHeader Pointer: ",avlFile.getIndexHead())
-for venta in ventas:
-    print(venta)
+        avlFile.remove(4)
+        print("Operacion Remove: \nHeader Pointer: ",avlFile.getIndexHead())
+        ventas=avlFile.getAllRecords()
+        for venta in ventas:
+            print(venta)
+        print()
 
-print()
+        print("Operacion search for key:")
+        venta=avlFile.search(20)
+        print(venta)
+        print()
 
-avlFile.remove(4)
-print("Operacion Remove: \nHeader Pointer: ",avlFile.getIndexHead())
-ventas=avlFile.getAllRecords()
-for venta in ventas:
-    print(venta)
-print()
+        print("Operacion search in range:")
+        ventas=avlFile.rangeSearch(8,20)
+        for venta in ventas:
+            print(venta)
+        print()
 
-print("Operacion search for key:")
-venta=avlFile.search(20)
-print(venta)
-print()
+        print("Operacion insert many:")
+        insertados=avlFile.insert_many([Venta(id,"Producto Lote",1,1.0,"2024-07-01") for id in range(110,100,-1)])
+        print("Insertados: ",insertados,"Header Pointer: ",avlFile.getIndexHead())
+        print()
 
-print("Operacion search in range:")
-ventas=avlFile.rangeSearch(8,20)
-for venta in ventas:
-    print(venta)
\ No newline at end of file
+        print("Operacion search many:")
+        for venta in avlFile.search_many([8,4,105,2]):
+            print(venta)
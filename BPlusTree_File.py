@@ -0,0 +1,358 @@
+import struct
+import os
+import time
+import random
+import importlib.util
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool, operation_name, PAGE_SIZE
+from Record_Codec import RecordCodec, LazyText
+
+# Registro: ID, Nombre, Cantidad, Precio, Fecha (mismo layout de Venta que las otras estructuras)
+FORMAT = '<i30sif10s'
+CODEC = RecordCodec(FORMAT)
+RECORD_SIZE = CODEC.size
+
+# Pagina 0: raiz, paginas usadas, cantidad de registros
+HEADER_CODEC = struct.Struct('<iii')
+# Cabecera de cada nodo: es hoja, cantidad de claves, siguiente hoja (-1 en nodos internos)
+NODE_CODEC = struct.Struct('<iii')
+NODE_HEADER_SIZE = NODE_CODEC.size
+
+# Capacidades por pagina: una hoja guarda registros completos, un nodo interno claves e hijos
+LEAF_CAPACITY = (PAGE_SIZE - NODE_HEADER_SIZE) // RECORD_SIZE
+INTERNAL_CAPACITY = (PAGE_SIZE - NODE_HEADER_SIZE - 4) // 8
+CHILDREN_OFFSET = NODE_HEADER_SIZE + INTERNAL_CAPACITY * 4
+
+
+class Venta:
+    __slots__ = ('id', '_nombre', 'cantidad', 'precio', '_fechaVenta')
+    nombre = LazyText(30, 'latin-1')
+    fechaVenta = LazyText(10, 'latin-1')
+
+    def __init__(self, id, nombre, cantidad, precio, fechaVenta):
+        self.id = id
+        self.nombre = nombre
+        self.cantidad = cantidad
+        self.precio = precio
+        self.fechaVenta = fechaVenta
+
+    def __str__(self):
+        return f"id: {self.id} Nombre: {self.nombre} Cantidad: {self.cantidad} Precio: {self.precio} FechaVenta: {self.fechaVenta}"
+
+    def to_bytes(self):
+        return CODEC.pack(self.id, Venta.nombre.encoded(self), self.cantidad, self.precio, Venta.fechaVenta.encoded(self))
+
+    @staticmethod
+    def from_bytes(data):
+        return Venta(*CODEC.unpack(data))
+
+
+class Node:
+    # Nodo en memoria: en una hoja `values` son los registros empaquetados, en un nodo interno los hijos
+    __slots__ = ('page', 'leaf', 'keys', 'values', 'next')
+
+    def __init__(self, page, leaf, keys, values, next=-1):
+        self.page = page
+        self.leaf = leaf
+        self.keys = keys
+        self.values = values
+        self.next = next
+
+
+class BPlusTreeFile:
+    # Arbol B+ en disco con nodos del tamaño de una pagina: las hojas guardan los registros y estan
+    # enlazadas para recorrer rangos en orden, los nodos internos tienen ~500 hijos.
+    # La eliminacion no fusiona nodos: las hojas pueden quedar con pocas claves (o vacias) y
+    # siguen enlazadas, lo que no afecta la correccion de las busquedas.
+
+    def __init__(self, filename, nuevo=True, pool=None):
+        self.filename = filename
+        self.pool = pool if pool is not None else buffer_pool
+        self.session = False
+        self.depth = 0
+        if nuevo or not os.path.exists(filename):
+            self.pool.invalidate(filename)
+            with open(filename, 'wb') as file:
+                file.write(HEADER_CODEC.pack(-1, 1, 0).ljust(PAGE_SIZE, b'\0'))
+
+    @classmethod
+    def open(cls, filename, nuevo=False, pool=None):
+        # Sesion: el archivo queda abierto en el buffer pool hasta close() o el fin del `with`
+        tree = cls(filename, nuevo, pool)
+        tree.session = True
+        return tree
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self.pool.flush(self.filename)
+
+    def close(self):
+        self.session = False
+        self.pool.release(self.filename)
+
+    @contextmanager
+    def operation(self, name=None):
+        self.depth += 1
+        self.pool.begin(operation_name(self, name))  # limite de la operacion logica para el log
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0 and not self.session:
+                self.pool.release(self.filename)
+            self.pool.end()
+
+    def _read_header(self):
+        return list(self.pool.unpack_from(self.filename, HEADER_CODEC, 0))
+
+    def _write_header(self, header):
+        self.pool.write(self.filename, 0, HEADER_CODEC.pack(*header))
+
+    def _allocate(self, header):
+        page = header[1]
+        header[1] += 1
+        return page
+
+    def _read(self, page):
+        data = self.pool.read(self.filename, page * PAGE_SIZE, PAGE_SIZE)
+        leaf, n, next = NODE_CODEC.unpack_from(data, 0)
+        if leaf:
+            offsets = range(NODE_HEADER_SIZE, NODE_HEADER_SIZE + n * RECORD_SIZE, RECORD_SIZE)
+            keys = [CODEC.key.unpack_from(data, offset)[0] for offset in offsets]
+            values = [data[offset:offset + RECORD_SIZE] for offset in offsets]
+        else:
+            keys = list(struct.unpack_from(f'<{n}i', data, NODE_HEADER_SIZE))
+            values = list(struct.unpack_from(f'<{n + 1}i', data, CHILDREN_OFFSET))
+        return Node(page, bool(leaf), keys, values, next)
+
+    def _write(self, node):
+        data = bytearray(PAGE_SIZE)
+        n = len(node.keys)
+        NODE_CODEC.pack_into(data, 0, int(node.leaf), n, node.next)
+        if node.leaf:
+            data[NODE_HEADER_SIZE:NODE_HEADER_SIZE + n * RECORD_SIZE] = b''.join(node.values)
+        else:
+            struct.pack_into(f'<{n}i', data, NODE_HEADER_SIZE, *node.keys)
+            struct.pack_into(f'<{n + 1}i', data, CHILDREN_OFFSET, *node.values)
+        self.pool.write(self.filename, node.page * PAGE_SIZE, data)
+
+    def _find_leaf(self, root, key, path=None):
+        # Desciende hasta la hoja que contiene (o contendria) la clave; guarda el camino si se pide
+        node = self._read(root)
+        while not node.leaf:
+            i = bisect_right(node.keys, key)
+            if path is not None:
+                path.append((node, i))
+            node = self._read(node.values[i])
+        return node
+
+    def insert(self, record):
+        with self.operation('insert'):
+            header = self._read_header()
+            if header[0] == -1:
+                leaf = Node(self._allocate(header), True, [record.id], [record.to_bytes()])
+                self._write(leaf)
+                header[0] = leaf.page
+                header[2] = 1
+                self._write_header(header)
+                return
+
+            path = []
+            leaf = self._find_leaf(header[0], record.id, path)
+            i = bisect_left(leaf.keys, record.id)
+            if i < len(leaf.keys) and leaf.keys[i] == record.id:
+                print(f"Error: Ya existe un registro con ID : {record.id}")
+                return
+            leaf.keys.insert(i, record.id)
+            leaf.values.insert(i, record.to_bytes())
+            header[2] += 1
+
+            # Division de la hoja: la mitad superior pasa a una hoja nueva enlazada a continuacion
+            promoted = None
+            if len(leaf.keys) > LEAF_CAPACITY:
+                mid = len(leaf.keys) // 2
+                right = Node(self._allocate(header), True, leaf.keys[mid:], leaf.values[mid:], leaf.next)
+                leaf.keys, leaf.values, leaf.next = leaf.keys[:mid], leaf.values[:mid], right.page
+                self._write(right)
+                promoted = (right.keys[0], right.page)
+            self._write(leaf)
+
+            # Propagacion de las divisiones hacia la raiz
+            while promoted and path:
+                parent, i = path.pop()
+                parent.keys.insert(i, promoted[0])
+                parent.values.insert(i + 1, promoted[1])
+                promoted = None
+                if len(parent.keys) > INTERNAL_CAPACITY:
+                    mid = len(parent.keys) // 2
+                    right = Node(self._allocate(header), False, parent.keys[mid + 1:], parent.values[mid + 1:])
+                    promoted = (parent.keys[mid], right.page)
+                    parent.keys, parent.values = parent.keys[:mid], parent.values[:mid + 1]
+                    self._write(right)
+                self._write(parent)
+
+            if promoted:  # se dividio la raiz
+                root = Node(self._allocate(header), False, [promoted[0]], [header[0], promoted[1]])
+                self._write(root)
+                header[0] = root.page
+            self._write_header(header)
+
+    def search(self, key):
+        with self.operation('search'):
+            header = self._read_header()
+            if header[0] == -1:
+                return None
+            leaf = self._find_leaf(header[0], key)
+            i = bisect_left(leaf.keys, key)
+            if i < len(leaf.keys) and leaf.keys[i] == key:
+                return Venta.from_bytes(leaf.values[i])
+            return None
+
+    def remove(self, key):
+        with self.operation('remove'):
+            header = self._read_header()
+            if header[0] == -1:
+                print(f"Error: El archivo no tiene registros")
+                return False
+            leaf = self._find_leaf(header[0], key)
+            i = bisect_left(leaf.keys, key)
+            if i == len(leaf.keys) or leaf.keys[i] != key:
+                print(f"Error: No existe un registro con ID : {key}")
+                return False
+            del leaf.keys[i]
+            del leaf.values[i]
+            self._write(leaf)
+            header[2] -= 1
+            self._write_header(header)
+            return True
+
+    def rangeSearch(self, init_key, end_key):
+        with self.operation('rangeSearch'):  # el cursor no cierra la operacion entre registros
+            return list(self.cursor(init_key, end_key))
+
+    def cursor(self, init_key=-2**31, end_key=2**31 - 1, limit=None):
+        # Un descenso hasta la hoja de init_key y luego lectura secuencial de hojas por los enlaces.
+        # Genera las ventas en orden de id (como mucho `limit`), leyendo cada hoja cuando se necesita;
+        # para continuar, otro cursor desde ultima.id + 1
+        with self.operation('cursor'):
+            header = self._read_header()
+            if header[0] == -1 or limit == 0:
+                return
+            leaf = self._find_leaf(header[0], init_key)
+            i = bisect_left(leaf.keys, init_key)
+            while True:
+                while i < len(leaf.keys):
+                    if leaf.keys[i] > end_key:
+                        return
+                    with self.pool.suspended(operation_name(self, 'cursor')):
+                        yield Venta.from_bytes(leaf.values[i])
+                    if limit is not None:
+                        limit -= 1
+                        if limit == 0:
+                            return
+                    i += 1
+                if leaf.next == -1:
+                    return
+                leaf = self._read(leaf.next)
+                i = 0
+
+    def getAllRecords(self):
+        return self.rangeSearch(-2**31, 2**31 - 1)
+
+    def count(self):
+        with self.operation('count'):
+            return self._read_header()[2]
+
+
+def cargar_filas_csv(ruta_csv):
+    with open(ruta_csv, "r", encoding="utf-8") as archivo:
+        next(archivo)
+        for linea in archivo:
+            id, nombre, cantidad, precio, fecha = linea.strip().split(",")
+            yield int(id), nombre, int(cantidad), float(precio), fecha
+
+
+def comparar_estructuras(ruta_csv="sales_dataset.csv", consultas=200):
+    # Carga el CSV registro por registro en las cuatro organizaciones y mide insercion,
+    # busquedas puntuales, busqueda por rango y eliminacion
+    import Sequential_File
+    import AVL_File
+    spec = importlib.util.spec_from_file_location("BST_File", os.path.join(os.path.dirname(os.path.abspath(__file__)), "BST File.py"))
+    BST_File = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(BST_File)
+
+    filas = list(cargar_filas_csv(ruta_csv))
+    random.shuffle(filas)  # ids en orden aleatorio: con ids ascendentes el BST degenera en una lista
+    ids = [fila[0] for fila in filas]
+    buscados = random.sample(ids, min(consultas, len(ids)))
+    ordenados = sorted(ids)
+    rango = (ordenados[len(ids) * 3 // 10], ordenados[len(ids) * 7 // 10])
+
+    archivos = ("bench_seq.dat", "bench_aux.dat", "bench_avl.dat", "bench_bst.dat", "bench_bplus.dat")
+    for ruta in archivos:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    estructuras = [
+        ("SequentialFile", Sequential_File.SequentialFile("bench_seq.dat", "bench_aux.dat", k=30),
+         lambda fila: Sequential_File.Venta(*fila), "search", "search_range", "delete"),
+        ("AvlFile", AVL_File.AvlFile.open("bench_avl.dat"),
+         lambda fila: AVL_File.Venta(*fila), "search", "rangeSearch", "remove"),
+        ("BSTFile", BST_File.BSTFile.open("bench_bst.dat"),
+         lambda fila: BST_File.Venta(*fila), "search", "rangeSearch", "remove"),
+        ("BPlusTreeFile", BPlusTreeFile.open("bench_bplus.dat", nuevo=True),
+         lambda fila: Venta(*fila), "search", "rangeSearch", "remove"),
+    ]
+
+    print(f"\nComparacion con {len(filas)} registros ({len(buscados)} busquedas puntuales):")
+    print(f"{'Estructura':<15}{'Insercion':>12}{'Busqueda':>12}{'Rango':>12}{'Eliminacion':>13}  (ms)")
+    for nombre, estructura, venta, buscar, rango_fn, eliminar in estructuras:
+        t0 = time.perf_counter()
+        for fila in filas:
+            estructura.insert(venta(fila))
+        t_insert = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for id in buscados:
+            getattr(estructura, buscar)(id)
+        t_search = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        list(getattr(estructura, rango_fn)(*rango))  # algunas devuelven generadores
+        t_range = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        getattr(estructura, eliminar)(buscados[0])
+        t_delete = (time.perf_counter() - t0) * 1000
+
+        if hasattr(estructura, "close"):
+            estructura.close()
+        print(f"{nombre:<15}{t_insert:>12.3f}{t_search:>12.3f}{t_range:>12.3f}{t_delete:>13.3f}")
+
+    for ruta in archivos:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+if __name__ == "__main__":
+    with BPlusTreeFile.open("ventas_bplus.dat", nuevo=True) as arbol:
+        for id, nombre, cantidad, precio, fecha in cargar_filas_csv("sales_dataset_prueba.csv"):
+            arbol.insert(Venta(id, nombre, cantidad, precio, fecha))
+
+        print("Operacion search for key:")
+        print(arbol.search(4))
+
+        print("\nOperacion remove:")
+        arbol.remove(4)
+        print(arbol.search(4))
+
+        print("\nOperacion search in range:")
+        for venta in arbol.rangeSearch(2, 7):
+            print(venta)
+
+    comparar_estructuras()
@@ -1,20 +1,88 @@
 import struct
 import csv
 import os
+import math
+from bisect import bisect_left
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool, operation_name, PagedFile
+from Record_Codec import RecordCodec
 
 # Formato del registro: ID, Nombre, Cantidad, Precio, Fecha, left, right
 FORMAT = 'i30sif10sii'
-HEADER_FORMAT = 'i'  # Cantidad de registros
+# Posiciones usadas, altura del arbol (en niveles), primera posicion libre, cantidad de posiciones libres,
+# version (cuantas veces se escribio la cabecera)
+HEADER_FORMAT = 'iiiii'
 HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
 RECORD_SIZE = struct.calcsize(FORMAT)
+CODEC = RecordCodec(FORMAT)  # formatos precompilados
+HEADER_CODEC = struct.Struct(HEADER_FORMAT)
+LINK_CODEC = struct.Struct('i')
+VERSION_CODEC = struct.Struct('i')
+VERSION_OFFSET = HEADER_SIZE - VERSION_CODEC.size
+LEFT_OFFSET = RECORD_SIZE - 8  # campo `left` dentro del registro
+RIGHT_OFFSET = RECORD_SIZE - 4  # campo `right`
+IO_BUFFER = 1 << 20  # buffer de escritura de la compactacion
+
+# Ningun hijo puede tener mas de ALPHA de los nodos de su padre (arbol de chivo expiatorio).
+# Tambien se compacta el archivo cuando los nodos vivos bajan de ALPHA de las posiciones usadas
+ALPHA = 0.7
+MIN_COMPACTAR = 64  # posiciones usadas por debajo de las cuales no se compacta
+
+
+def altura_maxima(count):
+    # Altura permitida para `count` nodos; si una insercion la supera se reconstruye un subarbol
+    return int(math.log(count, 1 / ALPHA)) + 1 if count > 1 else count
+
+
+def orden_bfs(n):
+    # Arbol balanceado sobre n elementos ordenados, por niveles: genera (elemento, hijo izq., hijo der.)
+    # donde los hijos son posiciones en este mismo orden (-1 si no hay)
+    cola = [(0, n - 1)] if n else []
+    siguiente = 1  # proxima posicion libre en orden BFS
+    for lo, hi in cola:  # la cola crece mientras se recorre
+        mid = (lo + hi) // 2
+        left = right = -1
+        if lo <= mid - 1:
+            left = siguiente
+            siguiente += 1
+            cola.append((lo, mid - 1))
+        if mid + 1 <= hi:
+            right = siguiente
+            siguiente += 1
+            cola.append((mid + 1, hi))
+        yield mid, left, right
+
+
+def orden_inorden(n):
+    # El mismo arbol balanceado que orden_bfs pero en orden de elemento: genera (elemento, hijo izq.,
+    # hijo der.) con los hijos tambien como elementos. La pila es O(log n)
+    pila = []
+    lo, hi = 0, n - 1
+    while pila or lo <= hi:
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            pila.append((lo, mid, hi))
+            hi = mid - 1
+        lo, mid, hi = pila.pop()
+        left = (lo + mid - 1) // 2 if lo <= mid - 1 else -1
+        right = (mid + 1 + hi) // 2 if mid + 1 <= hi else -1
+        yield mid, left, right
+        lo = mid + 1
 
 class Venta:
+    __slots__ = ('id_venta', 'nombre_producto', 'cantidad_vendida', 'precio_unitario', 'fecha_venta', 'left', 'right')
+
     def __init__(self, id_venta, nombre_producto, cantidad_vendida, precio_unitario, fecha_venta, left=-1, right=-1):
+        # Los textos se guardan como bytes; si ya vienen como bytes (leidos del disco) no se recodifican
+        if not isinstance(nombre_producto, bytes):
+            nombre_producto = nombre_producto.encode('utf-8')
+        if not isinstance(fecha_venta, bytes):
+            fecha_venta = fecha_venta.encode('utf-8')
         self.id_venta = id_venta
-        self.nombre_producto = nombre_producto.encode('utf-8')[:30].ljust(30, b' ')
+        self.nombre_producto = nombre_producto[:30].ljust(30, b' ')
         self.cantidad_vendida = cantidad_vendida
         self.precio_unitario = precio_unitario
-        self.fecha_venta = fecha_venta.encode('utf-8')[:10].ljust(10, b' ')
+        self.fecha_venta = fecha_venta[:10].ljust(10, b' ')
         self.left = left
         self.right = right
 
@@ -24,84 +92,317 @@ class Venta:
                 f"| Fecha: {self.fecha_venta.decode().strip()} | left: {self.left} | right: {self.right}")
 
 class BSTFile:
-    def __init__(self, filename):
+    def __init__(self, filename, pool=None):
         self.filename = filename
+        self.pool = pool if pool is not None else buffer_pool  # toda la E/S de registros pasa por el buffer pool
+        self.sesion = False
+        self.profundidad = 0  # operaciones anidadas en curso
+        self.cabecera = None  # cabecera en memoria (count, altura, libre, libres)
+        self.version = None
+        self.generacion = None
+        self.cabecera_sucia = False
+        self.validada = False  # ya se comparo con la version del archivo en esta operacion
         if not os.path.exists(filename):
+            self.pool.invalidate(filename)
             with open(filename, 'wb') as f:
-                f.write(struct.pack(HEADER_FORMAT, 0))  # Inicializa con 0 registros
+                f.write(struct.pack(HEADER_FORMAT, 0, 0, -1, 0, 0))  # Inicializa con 0 registros
+        else:
+            with self._archivo('__init__'):
+                count, altura, _, libres = self._header()
+            if altura > altura_maxima(count - libres):
+                self.rebuild()  # archivo degenerado (p. ej. escrito sin reequilibrar)
+
+    @classmethod
+    def open(cls, filename, pool=None):
+        # Sesion: el archivo queda abierto en el buffer pool para todas las operaciones dentro del `with`
+        archivo = cls(filename, pool)
+        archivo.sesion = True
+        return archivo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self._guardar_header()
+        self.pool.flush(self.filename)
+
+    def close(self):
+        self._guardar_header()
+        self.sesion = False
+        self.pool.close(self.filename)
+
+    def _entrar(self, nombre=None):
+        self.profundidad += 1
+        self.pool.begin(operation_name(self, nombre))  # limite de la operacion logica para el log
+
+    def _salir(self):
+        # Al terminar la operacion mas externa la cabecera modificada vuelve a su pagina (otra instancia
+        # la ve y, con log, entra en el mismo commit que los nodos). Fuera de una sesion ademas se
+        # vuelcan las paginas modificadas y se cierra el archivo
+        self.profundidad -= 1
+        if self.profundidad == 0:
+            self._guardar_header()
+            self.validada = False
+            if not self.sesion:
+                self.pool.release(self.filename)
+        self.pool.end()
+
+    @contextmanager
+    def _archivo(self, nombre=None):
+        self._entrar(nombre)
+        try:
+            yield PagedFile(self.pool, self.filename)
+        finally:
+            self._salir()
+
+    @contextmanager
+    def _pausa(self, nombre=None):
+        # El cursor entrega cada venta con la operacion cerrada y la vuelve a abrir al reanudarse
+        self._salir()
+        try:
+            yield
+        finally:
+            self._entrar(nombre)
+
+    def _count(self):
+        return self._header()[0]
+
+    def _header(self):
+        # La cabecera queda en memoria y se valida una vez por operacion. Primero el pool compara la
+        # version del disco con la que vio: si la cambio otro proceso descarta las paginas del archivo.
+        # Despues se vuelve a leer si cambio la version de la pagina (la escribio otra instancia) o si
+        # el pool descarto las paginas del archivo (rebuild, otro proceso, o Concurrent_File)
+        if not self.validada:
+            self.pool.validate(self.filename, VERSION_OFFSET, VERSION_CODEC.size)
+            generacion = self.pool.generation(self.filename)
+            if (self.cabecera is None or self.generacion != generacion or
+                    self.version != self.pool.unpack_from(self.filename, VERSION_CODEC, VERSION_OFFSET)[0]):
+                cabecera = self.pool.unpack_from(self.filename, HEADER_CODEC, 0)
+                self.cabecera, self.version = cabecera[:4], cabecera[4]
+                self.generacion = generacion
+            self.cabecera_sucia = False
+            self.validada = self.profundidad > 0
+        return self.cabecera
+
+    def _escribir_header(self, count, altura, libre, libres):
+        self._header()
+        self.cabecera = (count, altura, libre, libres)
+        self.cabecera_sucia = True
+
+    def _guardar_header(self):
+        if self.cabecera_sucia and self.generacion == self.pool.generation(self.filename):
+            self.version = (self.version + 1) & 0x7fffffff
+            self.pool.write(self.filename, 0, HEADER_CODEC.pack(*self.cabecera, self.version))
+        self.cabecera_sucia = False
+
+    def _reservar(self):
+        # Posicion para un nodo nuevo: la primera de la lista de libres o una al final
+        count, altura, libre, libres = self._header()
+        if libre != -1:
+            self._escribir_header(count, altura, self._nodo(HEADER_SIZE + libre * RECORD_SIZE)[5], libres - 1)
+            return libre
+        self._escribir_header(count + 1, altura, libre, libres)
+        return count
+
+    def _liberar(self, slot):
+        # La posicion pasa a la lista de libres: id -1 y `left` apuntando a la siguiente libre
+        count, altura, libre, libres = self._header()
+        self.pool.write(self.filename, HEADER_SIZE + slot * RECORD_SIZE, CODEC.pack(-1, b'', 0, 0.0, b'', libre, -1))
+        self._escribir_header(count, altura, slot, libres + 1)
+
+    def _enlazar(self, padre, campo, hijo):
+        self.pool.write(self.filename, HEADER_SIZE + padre * RECORD_SIZE + campo, LINK_CODEC.pack(hijo))
+
+    def _nodo(self, pos):
+        # Lee el nodo con unpack_from sobre la pagina en cache o el mapa (modo mmap); None si esta incompleto
+        if pos + RECORD_SIZE > self.pool.size(self.filename):
+            return None
+        return self.pool.unpack_from(self.filename, CODEC, pos)
 
     def insert(self, venta):
-        with open(self.filename, 'r+b') as f:
-            f.seek(0)
-            count = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))[0]
-
-            if count == 0:
-                f.seek(HEADER_SIZE)
-                f.write(struct.pack(FORMAT, venta.id_venta, venta.nombre_producto, venta.cantidad_vendida,
-                                venta.precio_unitario, venta.fecha_venta, -1, -1))
-                f.seek(0)
-                f.write(struct.pack(HEADER_FORMAT, 1))
+        with self._archivo('insert'):
+            nodo = CODEC.pack(venta.id_venta, venta.nombre_producto, venta.cantidad_vendida,
+                              venta.precio_unitario, venta.fecha_venta, -1, -1)
+
+            if self._count() == 0:
+                self.pool.write(self.filename, HEADER_SIZE, nodo)
+                self._escribir_header(1, 1, -1, 0)
                 return
 
-            pos = HEADER_SIZE
+            camino = [0]  # posiciones desde la raiz hasta el padre del nuevo nodo
             while True:
-                f.seek(pos)
-                data = f.read(RECORD_SIZE)
-                if len(data) < RECORD_SIZE:
-                    break  # archivo corrupto o fin inesperado
+                current = self._nodo(HEADER_SIZE + camino[-1] * RECORD_SIZE)
+                if current is None:
+                    return  # archivo corrupto o fin inesperado
 
-                current = struct.unpack(FORMAT, data)
                 current_id, _, _, _, _, left, right = current
-
-                if venta.id_venta < current_id:
-                    if left == -1:
-                        f.seek(pos + RECORD_SIZE - 8)  # campo `left`
-                        f.write(struct.pack('i', count))
-                        break
-                    else:
-                        pos = HEADER_SIZE + left * RECORD_SIZE
-                else:
-                    if right == -1:
-                        f.seek(pos + RECORD_SIZE - 4)  # campo `right`
-                        f.write(struct.pack('i', count))
-                        break
-                    else:
-                        pos = HEADER_SIZE + right * RECORD_SIZE
-
-            # Insertar nuevo nodo al final
-            f.seek(HEADER_SIZE + count * RECORD_SIZE)
-            f.write(struct.pack(FORMAT, venta.id_venta, venta.nombre_producto, venta.cantidad_vendida,
-                                venta.precio_unitario, venta.fecha_venta, -1, -1))
-            f.seek(0)
-            f.write(struct.pack(HEADER_FORMAT, count + 1))
-
+                campo, hijo = (LEFT_OFFSET, left) if venta.id_venta < current_id else (RIGHT_OFFSET, right)
+                if hijo == -1:
+                    break
+                camino.append(hijo)
+
+            # El nuevo nodo ocupa una posicion libre o se agrega al final
+            slot = self._reservar()
+            self.pool.write(self.filename, HEADER_SIZE + slot * RECORD_SIZE, nodo)
+            self._enlazar(camino[-1], campo, slot)
+            camino.append(slot)
+
+            count, altura, libre, libres = self._header()
+            altura = max(altura, len(camino))
+            # Nodo demasiado profundo: se reconstruye balanceado el subarbol del chivo expiatorio,
+            # despues de eso ningun nodo supera la altura permitida
+            limite = altura_maxima(count - libres)
+            if len(camino) > limite and self._reequilibrar(camino):
+                altura = min(altura, limite)
+            count, _, libre, libres = self._header()
+            self._escribir_header(count, altura, libre, libres)
+
+    def _inorden(self, slot):
+        # (posicion, nodo) de todo el subarbol en orden de id, sin recursion
+        nodos, pila = [], []
+        while pila or slot != -1:
+            while slot != -1:
+                nodo = self._nodo(HEADER_SIZE + slot * RECORD_SIZE)
+                pila.append((slot, nodo))
+                slot = nodo[5]
+            slot, nodo = pila.pop()
+            nodos.append((slot, nodo))
+            slot = nodo[6]
+        return nodos
+
+    def _reequilibrar(self, camino):
+        # Sube por el camino del nodo insertado hasta el primer ancestro con un hijo que tiene mas de
+        # ALPHA de sus nodos (el chivo expiatorio) y reconstruye ese subarbol
+        size = 1
+        for i in range(len(camino) - 2, -1, -1):
+            _, _, _, _, _, left, right = self._nodo(HEADER_SIZE + camino[i] * RECORD_SIZE)
+            hermano = right if left == camino[i + 1] else left
+            total = size + 1 + len(self._inorden(hermano))
+            if size > ALPHA * total:
+                self._reconstruir(camino[i], camino[i - 1] if i else -1)
+                return True
+            size = total
+        return False
+
+    def _reconstruir(self, slot, padre):
+        # Reescribe el subarbol balanceado y por niveles sobre las mismas posiciones (ordenadas),
+        # asi su raiz queda en la menor posicion y la raiz del arbol sigue en la posicion 0
+        nodos = self._inorden(slot)
+        posiciones = sorted(posicion for posicion, _ in nodos)
+        vivos = [nodo for _, nodo in nodos if nodo[0] != -1]
+        for i, (mid, left, right) in enumerate(orden_bfs(len(vivos))):
+            self.pool.write(self.filename, HEADER_SIZE + posiciones[i] * RECORD_SIZE, CODEC.pack(
+                *vivos[mid][:5],
+                posiciones[left] if left != -1 else -1,
+                posiciones[right] if right != -1 else -1))
+        for posicion in posiciones[len(vivos):]:
+            self._liberar(posicion)
+        if padre != -1:
+            campo = LEFT_OFFSET if self._nodo(HEADER_SIZE + padre * RECORD_SIZE)[5] == slot else RIGHT_OFFSET
+            self._enlazar(padre, campo, posiciones[0])
+
+    def rebuild(self):
+        # Compactacion en linea: reescribe el archivo sin posiciones libres, con el arbol balanceado y
+        # los nodos agrupados por id (la raiz en la posicion 0 y los demas en orden de id desde la 1).
+        # El arbol se recorre con un cursor y el temporal se escribe en secuencia, asi la memoria es
+        # O(altura) y no O(n). Si el arbol no tiene los nodos que indica la cabecera (archivo danado o de
+        # otro formato) no se reemplaza el archivo
+        with self._archivo('rebuild'):
+            count, _, _, libres = self._header()
+            n = count - libres
+            raiz = (n - 1) // 2
+
+            def posicion(rango):
+                if rango == -1:
+                    return -1
+                if rango == raiz:
+                    return 0
+                return rango + 1 if rango < raiz else rango
+
+            tmp = self.filename + '.tmp'
+            try:
+                with open(tmp, 'wb', buffering=IO_BUFFER) as out:
+                    # La version sigue a la actual: otro proceso nota que el archivo cambio
+                    out.write(HEADER_CODEC.pack(n, n.bit_length(), -1, 0, (self.version + 1) & 0x7fffffff))
+                    out.write(bytes(RECORD_SIZE) if n else b'')  # lugar de la raiz, se escribe al final
+                    ventas = self.cursor()
+                    escritos = 0
+                    for (rango, left, right), venta in zip(orden_inorden(n), ventas):
+                        nodo = CODEC.pack(venta.id_venta, venta.nombre_producto, venta.cantidad_vendida,
+                                          venta.precio_unitario, venta.fecha_venta, posicion(left), posicion(right))
+                        if rango == raiz:
+                            nodo_raiz = nodo
+                        else:
+                            out.write(nodo)
+                        escritos += 1
+                    sobran = next(ventas, None) is not None
+                    ventas.close()
+                    if escritos != n or sobran:
+                        print(f"Error: La cabecera indica {n} registros y el arbol tiene "
+                              f"{'mas' if sobran else escritos}, no se reconstruye el archivo")
+                        return False
+                    if n:
+                        out.seek(HEADER_SIZE)
+                        out.write(nodo_raiz)
+                    out.flush()
+                    os.fsync(out.fileno())
+                self.pool.invalidate(self.filename)
+                os.replace(tmp, self.filename)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        return True
+
+
+    def _siguiente_version(self):
+        # Version para el archivo reescrito: sigue a la que tenia, asi otro proceso nota el cambio
+        if not os.path.exists(self.filename):
+            return 0
+        with open(self.filename, 'rb') as f:
+            datos = f.read(HEADER_SIZE)
+        return (HEADER_CODEC.unpack(datos)[4] + 1) & 0x7fffffff if len(datos) == HEADER_SIZE else 0
+
+    def bulk_load(self, ventas):
+        # Reemplaza el contenido por un arbol balanceado construido desde la entrada ordenada.
+        # Los nodos se escriben por niveles (BFS) para que la raiz quede en la posicion 0,
+        # asi el archivo se escribe en una sola pasada. De un id repetido queda la primera venta y se
+        # informan las demas, como en AvlFile y SequentialFile
+        ventas = sorted(ventas, key=lambda venta: venta.id_venta)
+        unicas = []
+        for venta in ventas:
+            if unicas and unicas[-1].id_venta == venta.id_venta:
+                print(f"Error: Ya existe un registro con ID : {venta.id_venta}")
+                continue
+            unicas.append(venta)
+        ventas = unicas
+
+        self.pool.invalidate(self.filename)
+        version = self._siguiente_version()
+        with open(self.filename, 'wb') as f:
+            # La altura de un rango de n nodos partido por el centro es n.bit_length()
+            f.write(struct.pack(HEADER_FORMAT, len(ventas), len(ventas).bit_length(), -1, 0, version))
+            for mid, left, right in orden_bfs(len(ventas)):
+                venta = ventas[mid]
+                f.write(CODEC.pack(venta.id_venta, venta.nombre_producto, venta.cantidad_vendida,
+                                    venta.precio_unitario, venta.fecha_venta, left, right))
 
     def leer(self):
         ventas = []
-        with open(self.filename, 'rb') as f:
-            count_bytes = f.read(HEADER_SIZE)
-            if len(count_bytes) < HEADER_SIZE:
+        with self._archivo('leer'):
+            if self.pool.size(self.filename) < HEADER_SIZE:
                 return ventas  # archivo vacío
 
-            count = struct.unpack(HEADER_FORMAT, count_bytes)[0]
+            count = self._count()
 
             for i in range(count):
-                f.seek(HEADER_SIZE + i * RECORD_SIZE)
-                data = f.read(RECORD_SIZE)
-                if len(data) < RECORD_SIZE:
-                    continue  # registro incompleto
-
                 try:
-                    unpacked = struct.unpack(FORMAT, data)
-                    venta = Venta(
-                        unpacked[0],
-                        unpacked[1].decode('utf-8', errors='ignore').strip(),
-                        unpacked[2],
-                        unpacked[3],
-                        unpacked[4].decode('utf-8', errors='ignore').strip(),
-                        unpacked[5],
-                        unpacked[6]
-                    )
+                    unpacked = self._nodo(HEADER_SIZE + i * RECORD_SIZE)
+                    if unpacked is None or unpacked[0] == -1:
+                        continue  # registro incompleto o posicion libre
+                    venta = Venta(*unpacked)
                     ventas.append(venta)
                 except struct.error:
                     continue  # ignora errores al desempaquetar
@@ -110,28 +411,25 @@ class BSTFile:
 
 
     def search(self, key):
-        with open(self.filename, 'rb') as f:
-            f.seek(0)
-            count = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))[0]
+        with self._archivo('search'):
+            count = self._count()
             pos = HEADER_SIZE
 
             while True:
                 if pos >= HEADER_SIZE + count * RECORD_SIZE:
                     return None  # no encontrado
 
-                f.seek(pos)
-                data = f.read(RECORD_SIZE)
-                if len(data) < RECORD_SIZE:
+                unpacked = self._nodo(pos)
+                if unpacked is None:
                     return None
 
-                unpacked = struct.unpack(FORMAT, data)
                 id_venta, nombre, cantidad, precio, fecha, left, right = unpacked
 
                 if id_venta == -1:
                     return None  # eliminado
 
                 if key == id_venta:
-                    return Venta(id_venta, nombre.decode().strip(), cantidad, precio, fecha.decode().strip(), left, right)
+                    return Venta(*unpacked)
 
                 if key < id_venta:
                     if left == -1:
@@ -142,95 +440,139 @@ class BSTFile:
                         return None
                     pos = HEADER_SIZE + right * RECORD_SIZE
 
-    def remove(self, key):
-        with open(self.filename, 'r+b') as f:
-            f.seek(0)
-            count = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))[0]
-            pos = HEADER_SIZE
-
-            while True:
-                if pos >= HEADER_SIZE + count * RECORD_SIZE:
-                    return False
+    def search_many(self, keys):
+        # Busca varios ids en un solo descenso: con las claves ordenadas cada nodo se lee una vez y
+        # reparte las claves entre sus subarboles, los caminos de busqueda comparten su parte superior.
+        # Devuelve las ventas en el orden de `keys` (None para las que no existen)
+        keys = list(keys)
+        claves = sorted(set(keys))
+        encontradas = {}
+        with self._archivo('search_many'):
+            pila = [(0, 0, len(claves))] if self._count() and claves else []
+            while pila:
+                slot, lo, hi = pila.pop()  # claves[lo:hi] pueden estar en el subarbol de `slot`
+                nodo = self._nodo(HEADER_SIZE + slot * RECORD_SIZE)
+                if nodo is None or nodo[0] == -1:
+                    continue
+                mid = bisect_left(claves, nodo[0], lo, hi)
+                derecha = mid
+                if mid < hi and claves[mid] == nodo[0]:
+                    encontradas[nodo[0]] = Venta(*nodo)
+                    derecha = mid + 1
+                if lo < mid and nodo[5] != -1:
+                    pila.append((nodo[5], lo, mid))
+                if derecha < hi and nodo[6] != -1:
+                    pila.append((nodo[6], derecha, hi))
+        return [encontradas.get(key) for key in keys]
 
-                f.seek(pos)
-                data = f.read(RECORD_SIZE)
-                if len(data) < RECORD_SIZE:
+    def remove(self, key):
+        with self._archivo('remove'):
+            count, altura, libre, libres = self._header()
+            padre, campo = -1, 0
+            slot = 0 if count else -1
+            while slot != -1:
+                nodo = self._nodo(HEADER_SIZE + slot * RECORD_SIZE)
+                if nodo is None:
                     return False
-
-                unpacked = struct.unpack(FORMAT, data)
-                id_venta, _, _, _, _, left, right = unpacked
-
-                if key == id_venta:
-                    f.seek(pos)
-                    f.write(struct.pack('i', -1))  # marcar como eliminado
+                if nodo[0] == key:
+                    break
+                padre = slot
+                campo, slot = (LEFT_OFFSET, nodo[5]) if key < nodo[0] else (RIGHT_OFFSET, nodo[6])
+            if slot == -1:
+                return False
+
+            left, right = nodo[5], nodo[6]
+            if left != -1 and right != -1:
+                # Dos hijos: el sucesor (minimo del subarbol derecho) toma su lugar y se libera la
+                # posicion del sucesor, que tiene a lo sumo un hijo derecho
+                padre, campo, sucesor = slot, RIGHT_OFFSET, right
+                datos = self._nodo(HEADER_SIZE + sucesor * RECORD_SIZE)
+                while datos[5] != -1:
+                    padre, campo, sucesor = sucesor, LEFT_OFFSET, datos[5]
+                    datos = self._nodo(HEADER_SIZE + sucesor * RECORD_SIZE)
+                self.pool.write(self.filename, HEADER_SIZE + slot * RECORD_SIZE, CODEC.pack(*datos[:5], left, right))
+                self._enlazar(padre, campo, datos[6])
+                self._liberar(sucesor)
+            else:
+                hijo = left if left != -1 else right
+                if padre != -1:
+                    self._enlazar(padre, campo, hijo)
+                    self._liberar(slot)
+                elif hijo == -1:
+                    self._escribir_header(0, 0, -1, 0)  # se elimino el ultimo nodo
                     return True
-
-                if key < id_venta:
-                    if left == -1:
-                        return False
-                    pos = HEADER_SIZE + left * RECORD_SIZE
                 else:
-                    if right == -1:
-                        return False
-                    pos = HEADER_SIZE + right * RECORD_SIZE
+                    # La raiz siempre esta en la posicion 0: su unico hijo se copia ahi
+                    self.pool.write(self.filename, HEADER_SIZE, self.pool.read(
+                        self.filename, HEADER_SIZE + hijo * RECORD_SIZE, RECORD_SIZE))
+                    self._liberar(hijo)
 
-    def rangeSearch(self, init_key, end_key):
-        resultados = []
-
-        def in_order(pos):
-            with open(self.filename, 'rb') as f:
-                if pos == -1:
-                    return
-                f.seek(pos)
-                data = f.read(RECORD_SIZE)
-                if not data:
-                    return
-                unpacked = struct.unpack(FORMAT, data)
-                id_venta, nombre, cantidad, precio, fecha, left, right = unpacked
-                if id_venta == -1:
-                    return
+            count, _, _, libres = self._header()
+        if count >= MIN_COMPACTAR and count - libres < ALPHA * count:
+            self.rebuild()
+        return True
 
-                if left != -1:
-                    in_order(HEADER_SIZE + left * RECORD_SIZE)
-
-                if init_key <= id_venta <= end_key:
-                    venta = Venta(id_venta, nombre.decode().strip(), cantidad, precio, fecha.decode().strip(), left, right)
-                    resultados.append(venta)
-
-                if right != -1:
-                    in_order(HEADER_SIZE + right * RECORD_SIZE)
-
-        in_order(HEADER_SIZE)
-        return resultados
+    def rangeSearch(self, init_key, end_key):
+        return self.cursor(init_key, end_key)
+
+    def cursor(self, init_key=-2**31, end_key=2**31-1, limit=None):
+        # Recorrido inorden con pila y una sola apertura del archivo; genera las ventas en orden de id
+        # (como mucho `limit`). Si id <= init_key se descarta el subarbol izquierdo y al pasar end_key
+        # termina el recorrido, asi se leen O(log n + k) nodos. Los nodos eliminados (id -1) no se
+        # podan ni se devuelven. Para continuar, otro cursor desde ultima.id_venta + 1
+        with self._archivo('cursor'):
+            pila = []
+            slot = 0 if self._count() else -1
+            while (pila or slot != -1) and limit != 0:
+                while slot != -1:
+                    nodo = self._nodo(HEADER_SIZE + slot * RECORD_SIZE)
+                    pila.append(nodo)
+                    slot = nodo[5] if nodo[0] == -1 or nodo[0] > init_key else -1
+
+                nodo = pila.pop()
+                id_venta = nodo[0]
+                if id_venta != -1:
+                    if id_venta > end_key:
+                        return  # inorden: los nodos restantes tambien son mayores
+                    if id_venta >= init_key:
+                        with self._pausa('cursor'):
+                            yield Venta(*nodo)
+                        if limit is not None:
+                            limit -= 1
+                slot = nodo[6]
 
 if __name__ == "__main__":
-    archivo = BSTFile("ventas.dat")
-
-    # Insertar ventas
-    archivo.insert(Venta(1, "Producto A", 10, 5.5, "2024-07-01"))
-    archivo.insert(Venta(2, "Producto B", 5, 10.0, "2024-07-02"))
-    archivo.insert(Venta(3, "Producto C", 7, 8.75, "2024-07-03"))
-
-    # Leer todas las ventas
-    print("Ventas registradas:")
-    for venta in archivo.leer():
-        print(venta)
-
-    # Buscar una venta específica
-    print("\nBuscando venta con ID 2:")
-    resultado = archivo.search(2)
-    print(resultado if resultado else "No encontrada")
-
-    # Eliminar una venta
-    print("\nEliminando venta con ID 2")
-    archivo.remove(2)
-
-    # Verificar eliminación
-    print("\nVentas después de eliminación:")
-    for venta in archivo.leer():
-        print(venta)
-
-    # Búsqueda por rango
-    print("\nBuscando ventas con ID entre 1 y 3:")
-    for venta in archivo.rangeSearch(1, 3):
-        print(venta)
+    with BSTFile.open("ventas.dat") as archivo:
+        # Insertar ventas
+        archivo.insert(Venta(1, "Producto A", 10, 5.5, "2024-07-01"))
+        archivo.insert(Venta(2, "Producto B", 5, 10.0, "2024-07-02"))
+        archivo.insert(Venta(3, "Producto C", 7, 8.75, "2024-07-03"))
+
+        # Leer todas las ventas
+        print("Ventas registradas:")
+        for venta in archivo.leer():
+            print(venta)
+
+        # Buscar una venta específica
+        print("\nBuscando venta con ID 2:")
+        resultado = archivo.search(2)
+        print(resultado if resultado else "No encontrada")
+
+        # Eliminar una venta
+        print("\nEliminando venta con ID 2")
+        archivo.remove(2)
+
+        # Verificar eliminación
+        print("\nVentas después de eliminación:")
+        for venta in archivo.leer():
+            print(venta)
+
+        # Búsqueda por rango
+        print("\nBuscando ventas con ID entre 1 y 3:")
+        for venta in archivo.rangeSearch(1, 3):
+            print(venta)
+
+        # Búsqueda de varias ventas
+        print("\nBuscando ventas con ID 3, 2 y 1:")
+        for venta in archivo.search_many([3, 2, 1]):
+            print(venta if venta else "No encontrada")
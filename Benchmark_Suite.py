@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+import importlib.util
+from datetime import date, timedelta
+from multiprocessing import Pool
+try:
+    import resource
+except ImportError:  # sin resource (Windows) no se informa el pico de memoria
+    resource = None
+
+FILAS = (10 ** 3, 10 ** 4, 10 ** 5)  # tamaños por defecto; --filas admite hasta 10^7
+ORDENES = ("ordenado", "aleatorio", "sesgado")
+OPERACIONES = 1000  # operaciones medidas por carga de trabajo
+ANCHO_RANGO = 100  # registros por busqueda por rango
+ZONA_CALIENTE = 0.01  # fraccion del espacio de ids que recibe el 80% de los accesos sesgados
+PRODUCTOS = ("Laptop", "Mouse", "Teclado", "Monitor", "Impresora", "Auriculares", "Tablet",
+             "Smartphone", "Camara", "Power Bank Solar", "Router", "Disco SSD")
+FECHA_INICIAL = date(2023, 1, 1)
+
+
+def cargar_modulo(nombre, archivo):
+    # BST File.py tiene un espacio en el nombre y no se puede importar directamente
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(os.path.dirname(os.path.abspath(__file__)), archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def estructuras():
+    # nombre -> (abrir(prefijo), Venta, busqueda, rango, eliminacion, reconstruccion o None)
+    import Sequential_File
+    import AVL_File
+    BST_File = cargar_modulo("BST_File", "BST File.py")
+    return {
+        "SequentialFile": (lambda prefijo: Sequential_File.SequentialFile(prefijo + ".dat", prefijo + ".aux", k=30),
+                           Sequential_File.Venta, "search", "search_range", "delete", "rebuild"),
+        "AvlFile": (lambda prefijo: AVL_File.AvlFile.open(prefijo + ".dat"),
+                    AVL_File.Venta, "search", "rangeSearch", "remove", None),
+        "BSTFile": (lambda prefijo: BST_File.BSTFile.open(prefijo + ".dat"),
+                    BST_File.Venta, "search", "rangeSearch", "remove", "rebuild"),
+    }
+
+
+def generar_ventas(ids, semilla=0):
+    # Filas sinteticas (id, nombre, cantidad, precio, fecha) para los ids dados
+    rnd = random.Random(semilla)
+    for id in ids:
+        yield (id, rnd.choice(PRODUCTOS), rnd.randint(1, 20), round(rnd.uniform(5, 500), 2),
+               (FECHA_INICIAL + timedelta(days=rnd.randrange(730))).isoformat())
+
+
+def generar_claves(n, orden, cantidad, rnd, existentes=True, distintas=True):
+    # Claves de una carga de trabajo. Los registros cargados tienen ids pares 2..2n; las inserciones
+    # usan ids impares para no repetir. ordenado: claves ascendentes (inserciones al final del archivo),
+    # aleatorio: uniformes, sesgado: el 80% dentro de una zona caliente fija del ZONA_CALIENTE de los ids
+    # y el 20% uniforme. Las claves se sortean con reemplazo (una clave caliente se repite); con
+    # distintas=True (inserciones y eliminaciones) se descartan las repetidas
+    base = 2 if existentes else 1
+    if orden == "ordenado":
+        if existentes:
+            paso = max(1, n // cantidad)
+            return [2 + 2 * ((i * paso) % n) for i in range(cantidad)]
+        return list(range(2 * n + 1, 2 * n + 1 + 2 * cantidad, 2))
+    ancho = max(1, int(n * ZONA_CALIENTE))
+    inicio = (n - ancho) // 2  # la zona caliente es la misma en todas las cargas del caso
+    cantidad = min(cantidad, n) if distintas else cantidad
+    claves, elegidas = [], set()
+    while len(claves) < cantidad:
+        if orden == "sesgado" and rnd.random() < 0.8:
+            i = inicio + rnd.randrange(ancho)
+        else:
+            i = rnd.randrange(n)
+        if distintas:
+            if i in elegidas:
+                continue
+            elegidas.add(i)
+        claves.append(base + 2 * i)
+    return claves
+
+
+def percentil(valores, q):
+    return valores[min(len(valores) - 1, int(q * len(valores)))] if valores else 0.0
+
+
+def contadores_io(pool):
+    # Contadores del pool (aperturas, seeks, registros desempaquetados, paginas y bytes de disco) y
+    # bytes de las llamadas read/write del proceso (/proc/self/io, solo Linux): estos incluyen la E/S
+    # que no pasa por el pool, como la carga masiva y la reconstruccion
+    contadores = pool.counters() if hasattr(pool, "counters") else {}
+    io = {"rchar": 0, "wchar": 0}
+    if os.path.exists("/proc/self/io"):
+        with open("/proc/self/io") as archivo:
+            for linea in archivo:
+                campo, valor = linea.split(":")
+                io[campo] = int(valor)
+    contadores["bytes_leidos"] = io["rchar"]
+    contadores["bytes_escritos"] = io["wchar"]
+    return contadores
+
+
+def medir(nombre, operaciones, funcion, pool, registros=None, volcar=None):
+    # Latencia de cada operacion y E/S por operacion. `volcar` escribe las paginas pendientes al
+    # final: cuenta en el tiempo total (y en las escrituras) pero no en la latencia de ninguna operacion.
+    # Con `registros` la carga es una sola llamada sobre ese numero de registros (carga masiva, reconstruccion)
+    antes = contadores_io(pool)
+    latencias = []
+    t_inicio = time.perf_counter()
+    for argumento in operaciones:
+        t0 = time.perf_counter_ns()
+        funcion(argumento)
+        latencias.append((time.perf_counter_ns() - t0) / 1e6)
+    if volcar is not None:
+        volcar()
+    segundos = time.perf_counter() - t_inicio
+    despues = contadores_io(pool)
+    ops = registros if registros is not None else len(latencias)
+    latencias.sort()
+    resultado = {
+        "operacion": nombre,
+        "ops": ops,
+        "segundos": round(segundos, 6),
+        "por_segundo": round(ops / segundos, 1) if segundos else None,
+        "p50_ms": round(percentil(latencias, 0.50), 4),
+        "p99_ms": round(percentil(latencias, 0.99), 4),
+    }
+    # E/S por operacion: misses son paginas leidas del disco, writes paginas escritas
+    for contador, valor in antes.items():
+        resultado[contador + "_por_op"] = round((despues[contador] - valor) / max(1, ops), 3)
+    return resultado
+
+
+def ejecutar_caso(estructura, n, orden, ops=OPERACIONES, ancho=ANCHO_RANGO, directorio=".", semilla=0):
+    # Un caso (estructura, filas, orden): carga masiva de n registros y luego insercion, busqueda
+    # (una por una y en un lote con search_many), rango, eliminacion y reconstruccion.
+    # Se ejecuta en un proceso propio para medir su pico de memoria
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):  # los mensajes de las estructuras
+        return _ejecutar_caso(estructura, n, orden, ops, ancho, directorio, semilla)
+
+
+def _ejecutar_caso(estructura, n, orden, ops, ancho, directorio, semilla):
+    from Buffer_Pool import buffer_pool
+    abrir, Venta, buscar, rango, eliminar, reconstruir = estructuras()[estructura]
+    rnd = random.Random(semilla)
+    prefijo = os.path.join(directorio, f"bench_{estructura}_{n}_{orden}")
+    archivos = [prefijo + sufijo for sufijo in (".dat", ".aux")]
+    for ruta in archivos:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    archivo = abrir(prefijo)
+    volcar = getattr(archivo, "flush", None)
+    ops = min(ops, n)
+    inserciones = generar_claves(n, orden, ops, rnd, existentes=False)
+    busquedas = generar_claves(n, orden, ops, rnd, distintas=False)
+    rangos = [(clave, clave + 2 * ancho) for clave in generar_claves(n, orden, ops, rnd, distintas=False)]
+    eliminaciones = generar_claves(n, orden, ops, rnd)
+    nuevas = [Venta(*fila) for fila in generar_ventas(inserciones, semilla + 1)]
+
+    resultados = [
+        medir("carga", [None], lambda _: archivo.bulk_load(Venta(*fila) for fila in generar_ventas(range(2, 2 * n + 1, 2), semilla)),
+              buffer_pool, registros=n),
+        medir("insercion", nuevas, archivo.insert, buffer_pool, volcar=volcar),
+        medir("busqueda", busquedas, getattr(archivo, buscar), buffer_pool),
+        medir("busqueda_lote", [busquedas], archivo.search_many, buffer_pool, registros=len(busquedas)),
+        medir("rango", rangos, lambda limites: list(getattr(archivo, rango)(*limites)), buffer_pool),
+        medir("eliminacion", eliminaciones, getattr(archivo, eliminar), buffer_pool, volcar=volcar),
+    ]
+    if reconstruir is not None:
+        resultados.append(medir("reconstruccion", [None], lambda _: getattr(archivo, reconstruir)(), buffer_pool, registros=n))
+    if hasattr(archivo, "close"):
+        archivo.close()
+    for ruta in archivos:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    pico = None
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = pico * 1024 if sys.platform != "darwin" else pico  # Linux informa KiB, macOS bytes
+    return {"estructura": estructura, "filas": n, "orden": orden, "pico_rss_bytes": pico, "cargas": resultados}
+
+
+def ejecutar(filas=FILAS, ordenes=ORDENES, nombres=None, ops=OPERACIONES, ancho=ANCHO_RANGO, directorio=".", semilla=0):
+    # Todos los casos, cada uno en un proceso nuevo (el pico de memoria no se arrastra entre casos)
+    nombres = nombres or list(estructuras())
+    resultados = []
+    for n in filas:
+        for orden in ordenes:
+            for estructura in nombres:
+                with Pool(1, maxtasksperchild=1) as procesos:
+                    resultado = procesos.apply(ejecutar_caso, (estructura, n, orden, ops, ancho, directorio, semilla))
+                resultados.append(resultado)
+                print(f"{estructura:<15}{n:>10} {orden:<10}" + " ".join(
+                    f"{carga['operacion']}={carga['p50_ms']:.3f}/{carga['p99_ms']:.3f}ms" for carga in resultado["cargas"]),
+                    file=sys.stderr)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparacion de SequentialFile, AvlFile y BSTFile (resultados en JSON)")
+    parser.add_argument("--filas", type=int, nargs="+", default=list(FILAS))
+    parser.add_argument("--ordenes", nargs="+", choices=ORDENES, default=list(ORDENES))
+    parser.add_argument("--estructuras", nargs="+", choices=list(estructuras()))
+    parser.add_argument("--ops", type=int, default=OPERACIONES)
+    parser.add_argument("--ancho", type=int, default=ANCHO_RANGO)
+    parser.add_argument("--dir", default=".")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="archivo JSON (por defecto la salida estandar)")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.filas, args.ordenes, args.estructuras, args.ops, args.ancho, args.dir, args.semilla)
+    if args.salida:
+        with open(args.salida, "w") as archivo:
+            json.dump(resultados, archivo, indent=2)
+    else:
+        json.dump(resultados, sys.stdout, indent=2)
@@ -0,0 +1,430 @@
+import os
+import time
+import atexit
+import struct
+import threading
+import contextlib
+from functools import wraps
+from collections import OrderedDict
+from itertools import islice
+
+PAGE_SIZE = 4096
+POOL_BYTES = 8 * 1024 * 1024  # presupuesto por defecto de paginas en memoria
+# Contadores de E/S del pool: aperturas de archivo, seeks de PagedFile, lecturas pedidas, registros
+# desempaquetados desde las paginas, aciertos y fallos de cache, bytes leidos del disco, paginas y
+# bytes escritos al disco, paginas reemplazadas
+COUNTERS = ('opens', 'seeks', 'reads', 'unpacks', 'hits', 'misses', 'bytes_read', 'writes', 'bytes_written', 'evictions')
+
+
+def synchronized(method):
+    # Ejecuta el metodo con el candado del almacen: cada llamada es atomica entre hilos
+    @wraps(method)
+    def wrapper(self, *args):
+        with self.lock:
+            return method(self, *args)
+    return wrapper
+
+
+def operation_name(owner, method):
+    # Clase.metodo con el que una estructura abre su operacion logica (ver BufferPool.begin)
+    return f"{type(owner).__name__}.{method}" if method is not None else None
+
+
+class BufferPool:
+    # Cache de paginas de tamaño fijo compartida por todas las estructuras de archivo.
+    # Las paginas se identifican por (ruta, numero de pagina), se reemplazan por LRU cuando se
+    # supera el presupuesto en bytes y las modificadas se escriben de vuelta al hacer flush.
+    # Toda la E/S de registros de un archivo debe pasar por el pool para que la cache sea coherente.
+    # Con un log de escritura anticipada (use_wal) las paginas sucias no llegan a los archivos hasta
+    # que se confirma un grupo de operaciones completas (ver Write_Ahead_Log).
+
+    def __init__(self, page_size=PAGE_SIZE, capacity=POOL_BYTES):
+        self.page_size = page_size
+        self.capacity = capacity
+        self.pages = OrderedDict()  # (ruta, pagina) -> bytearray, el menos usado primero
+        self.dirty = set()
+        self.fds = {}    # ruta -> descriptor abierto
+        self.sizes = {}  # ruta -> tamaño logico (incluye escrituras aun no volcadas)
+        self.paths = {}  # nombre -> ruta absoluta
+        self.generations = {}  # ruta -> veces que se descartaron sus paginas (ver generation)
+        self.stamps = {}  # ruta -> (posicion, bytes) de la version de cabecera vista en el disco (ver validate)
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+        self.tracer = None  # funcion llamada con la E/S de cada operacion logica (ver trace)
+        self.wal = None
+        self.exit_checkpoint = False  # checkpoint registrado en atexit
+        self.local = threading.local()  # por hilo: profundidad de operaciones anidadas, si escribio, traza
+        self.writing = set()  # hilos con una operacion en curso que ya modifico paginas
+        self.pending = 0  # operaciones terminadas sin confirmar en el log
+        self.lock = threading.RLock()  # el pool se comparte entre los hilos lectores
+
+    def _path(self, name):
+        path = self.paths.get(name)
+        if path is None:
+            path = self.paths[name] = os.path.abspath(name)
+        return path
+
+    def _fd(self, path):
+        fd = self.fds.get(path)
+        if fd is None:
+            fd = self.fds[path] = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            self.opens += 1
+            self.sizes[path] = max(self.sizes.get(path, 0), os.fstat(fd).st_size)
+        return fd
+
+    def _page(self, path, number):
+        key = (path, number)
+        page = self.pages.get(key)
+        if page is not None:
+            self.hits += 1
+            self.pages.move_to_end(key)
+            return page
+        self.misses += 1
+        data = os.pread(self._fd(path), self.page_size, number * self.page_size)
+        self.bytes_read += len(data)
+        page = self.pages[key] = bytearray(data.ljust(self.page_size, b'\0'))
+        self._evict()
+        return page
+
+    def _evict(self):
+        while len(self.pages) * self.page_size > self.capacity and len(self.pages) > 1:
+            if self.wal is not None:
+                # Sin robo: una pagina sucia no se escribe antes del commit, se reemplaza la limpia menos
+                # usada (nunca la recien pedida, que es la ultima)
+                key = next((key for key in islice(self.pages, len(self.pages) - 1) if key not in self.dirty), None)
+                if key is None:
+                    return  # todas sucias: el pool crece hasta el proximo commit
+                del self.pages[key]
+            else:
+                key, page = self.pages.popitem(last=False)
+                if key in self.dirty:
+                    self._write_page(key, page)
+            self.evictions += 1
+
+    def _write_page(self, key, page):
+        path, number = key
+        start = number * self.page_size
+        self.bytes_written += os.pwrite(self._fd(path), page[:min(self.page_size, self.sizes[path] - start)], start)
+        self.dirty.discard(key)
+        self.writes += 1
+        stamp = self.stamps.get(path)
+        if stamp is not None and stamp[0] // self.page_size == number:
+            # La version que llega al disco es la propia: no indica una escritura de otro proceso
+            offset = stamp[0] - start
+            self.stamps[path] = (stamp[0], bytes(page[offset:offset + len(stamp[1])]))
+
+    @synchronized
+    def size(self, name):
+        path = self._path(name)
+        self._fd(path)
+        return self.sizes[path]
+
+    @synchronized
+    def read(self, name, offset, size):
+        self.reads += 1
+        path = self._path(name)
+        end = min(offset + size, self.size(name))
+        if offset >= end:
+            return b''
+        number, start = divmod(offset, self.page_size)
+        if start + (end - offset) <= self.page_size:  # caso comun: el registro cae en una sola pagina
+            return bytes(self._page(path, number)[start:start + end - offset])
+        data = bytearray()
+        while offset < end:
+            number, start = divmod(offset, self.page_size)
+            chunk = self._page(path, number)[start:start + end - offset]
+            data += chunk
+            offset += len(chunk)
+        return bytes(data)
+
+    @synchronized
+    def unpack_from(self, name, codec, offset):
+        # Desempaqueta (con un struct.Struct precompilado) directamente desde la pagina en cache
+        # cuando el registro no la atraviesa
+        self.unpacks += 1
+        size = codec.size
+        if offset + size > self.size(name):
+            raise struct.error(f"lectura fuera del archivo {name} en la posicion {offset}")
+        number, start = divmod(offset, self.page_size)
+        if start + size <= self.page_size:
+            return codec.unpack_from(self._page(self._path(name), number), start)
+        return codec.unpack(self.read(name, offset, size))
+
+    @synchronized
+    def validate(self, name, offset, size):
+        # Compara los bytes del disco en [offset, offset + size) (la version de la cabecera de una
+        # estructura) con los que el pool vio o escribio ahi la ultima vez, leyendolos con pread sin
+        # pasar por la cache. Si otro proceso los cambio, las paginas del archivo en cache ya no valen
+        # y se descartan. Mientras esa pagina tiene cambios propios sin volcar no se compara
+        path = self._path(name)
+        if (path, offset // self.page_size) in self.dirty:
+            return
+        stamp = os.pread(self._fd(path), size, offset)
+        known = self.stamps.get(path)
+        if known is not None and known[1] != stamp:
+            self.invalidate(name)
+        self.stamps[path] = (offset, stamp)
+
+    def generation(self, name):
+        # Cambia cada vez que se descartan las paginas del archivo (invalidate): una estructura que
+        # guarda su cabecera en memoria la compara con la generacion en que la leyo
+        return self.generations.get(self._path(name), 0)
+
+    @synchronized
+    def write(self, name, offset, data):
+        path = self._path(name)
+        self._fd(path)
+        local = self.local
+        if getattr(local, 'depth', 0) and not local.wrote:
+            local.wrote = True
+            self.writing.add(threading.get_ident())
+        end = offset + len(data)
+        done = 0
+        while done < len(data):
+            number, start = divmod(offset + done, self.page_size)
+            page = self._page(path, number)
+            chunk = data[done:done + self.page_size - start]
+            page[start:start + len(chunk)] = chunk
+            self.dirty.add((path, number))
+            done += len(chunk)
+        if end > self.sizes[path]:
+            self.sizes[path] = end
+
+    @synchronized
+    def flush(self, name=None):
+        # Escribe las paginas sucias (de un archivo o de todos) en orden de posicion.
+        # Con log, confirma todas las operaciones terminadas
+        if self.wal is not None:
+            self.commit()
+            return
+        path = self._path(name) if name is not None else None
+        for key in sorted(key for key in self.dirty if path is None or key[0] == path):
+            self._write_page(key, self.pages[key])
+
+    @synchronized
+    def use_wal(self, wal):
+        # Activa el log (ya reproducido al abrirlo): se descartan de la cache los archivos que cambio
+        for path in wal.replayed:
+            self.invalidate(path)
+        self.wal = wal
+        if not self.exit_checkpoint:
+            atexit.register(self.checkpoint)  # al salir normalmente el log queda vacio
+            self.exit_checkpoint = True
+
+    @synchronized
+    def trace(self, tracer):
+        # Con un trazador, al terminar cada operacion logica externa se llama tracer(evento): un dict con
+        # 'operation' (el nombre pasado a begin), 'seconds' y lo que aumento cada contador durante la operacion.
+        # Con None se desactiva y solo quedan los contadores. Con varios hilos a la vez la E/S de las
+        # operaciones concurrentes se suma a la que termine
+        self.tracer = tracer
+
+    def counters(self):
+        return {counter: getattr(self, counter) for counter in COUNTERS}
+
+    @synchronized
+    def reset_stats(self):
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    @synchronized
+    def begin(self, name=None):
+        # Las operaciones se cuentan por hilo: los lectores de otros hilos no retrasan los commits.
+        # `name` identifica la operacion en la traza; el de las anidadas se ignora
+        local = self.local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            local.wrote = False
+            local.traced = None
+            if self.tracer is not None:
+                local.traced = (name, self.counters(), time.perf_counter())
+        local.depth = depth + 1
+
+    @synchronized
+    def end(self):
+        # Fin de una operacion logica; la mas externa del hilo, si modifico paginas, cuenta para el
+        # commit en grupo. El commit espera a que ningun otro hilo este a mitad de una operacion que
+        # escribio (salvo que las paginas sucias ya no entren en el pool)
+        local = self.local
+        local.depth -= 1
+        if local.depth:
+            return
+        if local.wrote:
+            local.wrote = False
+            self.writing.discard(threading.get_ident())
+            if self.wal is not None:
+                self.pending += 1
+                dirty = len(self.dirty) * self.page_size
+                if (self.pending >= self.wal.group_size or dirty > self.capacity // 2) and not self.writing \
+                        or dirty > self.capacity:
+                    self.commit()
+        if local.traced is not None:
+            name, before, start = local.traced
+            local.traced = None
+            if self.tracer is not None:
+                event = {"operation": name, "seconds": time.perf_counter() - start}
+                event.update((counter, getattr(self, counter) - value) for counter, value in before.items())
+                self.tracer(event)
+
+    @contextlib.contextmanager
+    def suspended(self, name=None):
+        # Un cursor entrega cada registro con su operacion cerrada y la reabre (como `name`) al reanudarse:
+        # un generador suspendido no cuenta como operacion en curso ni retrasa el commit del grupo
+        self.end()
+        try:
+            yield
+        finally:
+            self.begin(name)
+
+    @synchronized
+    def commit(self):
+        # Commit en grupo: las paginas sucias de todas las operaciones terminadas van al log con un
+        # solo fsync y despues se escriben (sin fsync) en los archivos de datos
+        self.pending = 0
+        if self.wal is None or not self.dirty:
+            return
+        keys = sorted(self.dirty)
+        pages = []
+        for path, number in keys:
+            self._fd(path)
+            start = number * self.page_size
+            pages.append((path, start, bytes(self.pages[(path, number)][:min(self.page_size, self.sizes[path] - start)])))
+        self.wal.append(pages)
+        for key in keys:
+            self._write_page(key, self.pages[key])
+        if self.wal.size > self.wal.checkpoint_bytes:
+            self.checkpoint()
+
+    @synchronized
+    def checkpoint(self):
+        # Tras el commit los archivos de datos ya tienen todo lo confirmado: se sincronizan y se vacia el log
+        if self.wal is None:
+            return
+        self.commit()
+        for path in self.wal.paths:
+            fd = self.fds.get(path)
+            if fd is not None:
+                os.fsync(fd)
+            elif os.path.exists(path):
+                fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                os.fsync(fd)
+                os.close(fd)
+        self.wal.truncate()
+
+    @synchronized
+    def release(self, name):
+        # Fin de una operacion/sesion: vuelca el archivo y cierra su descriptor, las paginas limpias quedan en cache.
+        # Con log, al final de una operacion no se vuelca nada (lo hace el commit del grupo)
+        path = self._path(name)
+        if self.wal is not None:
+            if getattr(self.local, 'depth', 0) or self.writing:
+                return
+            self.commit()
+        self.flush(name)
+        fd = self.fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+        self.sizes.pop(path, None)
+
+    def close(self, name):
+        # Fin de una sesion: como release (el almacen mmap ademas desmapea el archivo)
+        self.release(name)
+
+    @synchronized
+    def invalidate(self, name):
+        # Descarta las paginas de un archivo que se va a reescribir por fuera del pool.
+        # Con log, antes se confirma y se vacia el log para que no se reproduzcan paginas viejas
+        # sobre el archivo nuevo
+        path = self._path(name)
+        if self.wal is not None:
+            self.checkpoint()
+        self.generations[path] = self.generations.get(path, 0) + 1
+        self.stamps.pop(path, None)
+        for key in [key for key in self.pages if key[0] == path]:
+            del self.pages[key]
+            self.dirty.discard(key)
+        fd = self.fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+        self.sizes.pop(path, None)
+
+    @synchronized
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            **self.counters(),
+            "hit_ratio": self.hits / total if total else 0.0,
+            "pages": len(self.pages),
+            "bytes": len(self.pages) * self.page_size,
+        }
+
+
+class PagedFile:
+    # Vista tipo archivo (seek/tell/read/write) de un archivo gestionado por el buffer pool,
+    # para el codigo que recorre los registros con un manejador
+
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+        self.pos = 0
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += self.pool.size(self.name)
+        if offset != self.pos:
+            self.pool.seeks += 1
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def read(self, size=-1):
+        if size < 0:
+            size = max(self.pool.size(self.name) - self.pos, 0)
+        data = self.pool.read(self.name, self.pos, size)
+        self.pos += len(data)
+        return data
+
+    def write(self, data):
+        self.pool.write(self.name, self.pos, data)
+        self.pos += len(data)
+        return len(data)
+
+    def flush(self):
+        self.pool.flush(self.name)
+
+
+# Pool compartido por defecto por SequentialFile, AvlFile y BSTFile
+buffer_pool = BufferPool()
+
+
+if __name__ == "__main__":
+    import random
+    from AVL_File import AvlFile, Venta
+
+    # Lecturas por busqueda a medida que crece el archivo (con el pool frio antes de cada medicion).
+    # Se usa el pool del modulo importado por AvlFile, no el de este script
+    eventos = []
+    with AvlFile.open("ventas_traza.dat") as avlFile:
+        pool = avlFile.pool
+        ids = list(range(1, 50001))
+        random.shuffle(ids)
+        insertados = 0
+        for tamaño in (100, 1000, 10000, 50000):
+            for id in ids[insertados:tamaño]:
+                avlFile.insert(Venta(id, "Producto", 1, 1.0, "2024-01-01"))
+            insertados = tamaño
+            avlFile.flush()
+            pool.invalidate(avlFile.filename)
+            pool.trace(eventos.append)
+            for id in random.sample(ids[:tamaño], 100):
+                avlFile.search(id)
+            pool.trace(None)
+            print(f"{tamaño:>7} registros: {sum(e['unpacks'] for e in eventos) / len(eventos):5.1f} nodos leidos, "
+                  f"{sum(e['misses'] for e in eventos) / len(eventos):5.2f} paginas del disco, "
+                  f"{sum(e['seconds'] for e in eventos) / len(eventos) * 1e6:6.1f} us por busqueda ({eventos[0]['operation']})")
+            eventos.clear()
+    os.remove("ventas_traza.dat")
@@ -0,0 +1,227 @@
+import os
+import copy
+import struct
+import inspect
+import threading
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool
+try:
+    import fcntl
+except ImportError:  # sin fcntl (Windows) solo se coordinan los hilos del proceso
+    fcntl = None
+
+# El archivo de bloqueo guarda la version de la estructura (cuantas escrituras se publicaron)
+VERSION_CODEC = struct.Struct('<q')
+# Metodos que solo leen: se ejecutan con el candado compartido, el resto con el exclusivo
+READ_METHODS = {'search', 'search_many', 'rangeSearch', 'search_range', 'cursor', 'getAllRecords', 'leer', 'count',
+                'getIndexHead', 'getCountRegister'}
+
+
+class FileLock:
+    # Candado lector/escritor de una estructura: muchos lectores a la vez o un solo escritor.
+    # Entre hilos del proceso se coordina con una condicion (los escritores en espera tienen
+    # preferencia para no quedar postergados); entre procesos con fcntl.flock sobre <archivo>.lock,
+    # compartido mientras haya algun lector en el proceso y exclusivo durante una escritura.
+    # Al terminar una escritura se vuelcan las paginas y se incrementa la version del archivo de
+    # bloqueo; un proceso que la encuentra cambiada descarta sus paginas en cache de la estructura.
+    # Un hilo que ya tiene el candado compartido (p. ej. recorriendo un cursor) puede volver a tomarlo
+    # aunque haya escritores esperando, pero no puede pasar al exclusivo: se lanza RuntimeError en
+    # vez de esperar para siempre a que el mismo hilo suelte su lectura.
+
+    def __init__(self, filename, files=None, pool=None, flush=None):
+        self.path = filename + '.lock'
+        self.files = files if files is not None else [filename]
+        self.pool = pool if pool is not None else buffer_pool
+        self.flush = flush  # flush() de la estructura: escribe tambien lo que guarda en memoria (cabecera)
+        self.cond = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.waiting = 0  # escritores esperando: los lectores nuevos les ceden el paso
+        self.holders = {}  # hilo -> veces que tiene tomado el candado compartido
+        self.version = None
+        self.fd = None
+        self.pid = None
+
+    def _fd(self):
+        # Descriptor propio de cada proceso: uno heredado por fork compartiria el flock con el padre
+        if self.pid != os.getpid():
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            self.pid = os.getpid()
+            self.version = None
+        return self.fd
+
+    def _flock(self, mode):
+        if fcntl is not None:
+            fcntl.flock(self._fd(), getattr(fcntl, mode))
+
+    def _sync(self):
+        # Si otro proceso escribio desde la ultima vez (o es el primer acceso con este candado),
+        # las paginas en cache ya no valen
+        data = os.pread(self._fd(), VERSION_CODEC.size, 0)
+        version = VERSION_CODEC.unpack(data)[0] if len(data) == VERSION_CODEC.size else 0
+        if version != self.version:
+            for name in self.files:
+                self.pool.invalidate(name)
+        self.version = version
+
+    @contextmanager
+    def shared(self):
+        hilo = threading.get_ident()
+        with self.cond:
+            while (self.writer or self.waiting) and not self.holders.get(hilo):
+                self.cond.wait()
+            if self.readers == 0:
+                self._flock('LOCK_SH')
+                self._sync()
+            self.readers += 1
+            self.holders[hilo] = self.holders.get(hilo, 0) + 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.readers -= 1
+                self.holders[hilo] -= 1
+                if not self.holders[hilo]:
+                    del self.holders[hilo]
+                if self.readers == 0:
+                    self._flock('LOCK_UN')
+                    self.cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self.cond:
+            if self.holders.get(threading.get_ident()):
+                raise RuntimeError(f"{self.path}: no se puede escribir mientras el mismo hilo tiene abierto "
+                                   "un cursor o una lectura de la estructura")
+            self.waiting += 1
+            while self.writer or self.readers:
+                self.cond.wait()
+            self.waiting -= 1
+            self.writer = True
+            self._flock('LOCK_EX')
+            self._sync()
+        try:
+            yield
+        finally:
+            try:
+                # Los demas procesos leen los archivos: se vuelcan las paginas y se publica la version
+                if self.flush is not None:
+                    self.flush()
+                for name in self.files:
+                    self.pool.flush(name)
+                self.version += 1
+                os.pwrite(self._fd(), VERSION_CODEC.pack(self.version), 0)
+            finally:
+                with self.cond:
+                    self.writer = False
+                    self._flock('LOCK_UN')
+                    self.cond.notify_all()
+
+    def close(self):
+        if self.pid == os.getpid():
+            os.close(self.fd)
+        self.fd = self.pid = None
+
+
+class ConcurrentFile:
+    # Acceso concurrente a una estructura (AvlFile, BSTFile, SequentialFile, BPlusTreeFile,
+    # ExtendibleHashFile): muchos lectores en paralelo con un escritor a la vez, en hilos o procesos.
+    # Las consultas toman el candado compartido y las modificaciones el exclusivo; los cursores lo
+    # mantienen mientras se recorren. La estructura queda en modo sesion y toda su E/S es pread/pwrite
+    # del pool, sin posicion de archivo compartida entre hilos. Cada hilo usa su propia copia de la
+    # estructura, asi el estado de su operacion en curso (profundidad, cabecera en memoria, lote de
+    # insert_many) no lo pisan los demas; las copias se ven entre si a traves de la version de la
+    # cabecera en el pool, como dos instancias sobre el mismo archivo.
+    # Un hilo no puede modificar la estructura mientras recorre un cursor de ella (RuntimeError).
+    # Con el GIL, las lecturas escalan con los nucleos usando varios procesos (cada uno con su
+    # ConcurrentFile sobre los mismos archivos); los hilos solo se solapan en la E/S.
+
+    def __init__(self, estructura):
+        self.estructura = estructura
+        if hasattr(estructura, 'sesion'):
+            estructura.sesion = True
+        else:
+            estructura.session = True
+        files = [getattr(estructura, attr) for attr in ('filename', 'auxfile', 'dirfile') if hasattr(estructura, attr)]
+        self.lock = FileLock(estructura.filename, files, estructura.pool, getattr(estructura, 'flush', None))
+        self.local = threading.local()  # copia de la estructura de cada hilo (ver _estructura)
+
+    def _estructura(self):
+        # Las copias comparten el pool y parten del estado en reposo de la estructura original
+        estructura = getattr(self.local, 'estructura', None)
+        if estructura is None:
+            pool = self.estructura.pool
+            estructura = self.local.estructura = copy.deepcopy(self.estructura, {id(pool): pool})
+        return estructura
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Las escrituras ya se volcaron al soltar el candado exclusivo
+        if hasattr(self.estructura, 'close'):
+            self.estructura.close()
+        else:
+            for name in self.lock.files:
+                self.estructura.pool.release(name)
+        self.lock.close()
+
+    def _recorrer(self, generador):
+        with self.lock.shared():
+            yield from generador
+
+    def __getattr__(self, name):
+        metodo = getattr(self._estructura(), name)
+        if not callable(metodo):
+            return metodo
+        lock = self.lock.shared if name in READ_METHODS else self.lock.exclusive
+
+        def llamada(*args, **kwargs):
+            if inspect.isgeneratorfunction(metodo):
+                return self._recorrer(metodo(*args, **kwargs))
+            with lock():
+                resultado = metodo(*args, **kwargs)
+            if inspect.isgenerator(resultado):
+                # rangeSearch de BSTFile devuelve el cursor: el candado se toma al recorrerlo
+                return self._recorrer(resultado)
+            return resultado
+        return llamada
+
+
+if __name__ == "__main__":
+    import time
+    import random
+    from multiprocessing import Pool
+    from AVL_File import AvlFile
+
+    RUTA = "ventas_concurrente.dat"
+    BUSQUEDAS = 20000
+
+    def lector(semilla):
+        # Cada proceso abre su propio acceso concurrente a los mismos archivos
+        rnd = random.Random(semilla)
+        with ConcurrentFile(AvlFile.open(RUTA)) as ventas:
+            encontrados = sum(ventas.search(rnd.randint(1, 1000)) is not None for _ in range(BUSQUEDAS))
+        return encontrados
+
+    AvlFile.open(RUTA, "sales_dataset.csv").close()
+    for procesos in (1, 2, 4):
+        t0 = time.perf_counter()
+        with Pool(procesos) as pool:
+            encontrados = sum(pool.map(lector, range(procesos)))
+        segundos = time.perf_counter() - t0
+        print(f"{procesos} lectores: {procesos * BUSQUEDAS / segundos:.0f} busquedas por segundo ({encontrados} encontradas)")
+
+    # Un escritor en paralelo con hilos lectores del mismo proceso
+    with ConcurrentFile(AvlFile.open(RUTA)) as ventas:
+        lectores = [threading.Thread(target=lambda: list(ventas.cursor(1, 1000))) for _ in range(4)]
+        for hilo in lectores:
+            hilo.start()
+        ventas.remove(500)
+        for hilo in lectores:
+            hilo.join()
+        print("\nOperacion search despues de remove:")
+        print(ventas.search(500))
@@ -0,0 +1,231 @@
+import struct
+import os
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool, operation_name, PAGE_SIZE
+from BPlusTree_File import Venta, CODEC, RECORD_SIZE, cargar_filas_csv
+
+# Directorio (archivo .dir): profundidad global y paginas de buckets usadas, luego 2^profundidad punteros
+DIR_HEADER_CODEC = struct.Struct('<ii')
+POINTER_CODEC = struct.Struct('<i')
+# Cabecera de cada bucket: profundidad local, cantidad de registros, pagina de desborde (-1 si no hay)
+BUCKET_CODEC = struct.Struct('<iii')
+BUCKET_HEADER_SIZE = BUCKET_CODEC.size
+BUCKET_CAPACITY = (PAGE_SIZE - BUCKET_HEADER_SIZE) // RECORD_SIZE
+
+MAX_DEPTH = 20  # con esta profundidad local ya no se divide: se encadenan paginas de desborde
+
+
+def hash_id(key):
+    # Mezcla de bits del id (los ids consecutivos quedan repartidos en todos los buckets)
+    key &= 0xFFFFFFFF
+    key = ((key >> 16) ^ key) * 0x45D9F3B & 0xFFFFFFFF
+    key = ((key >> 16) ^ key) * 0x45D9F3B & 0xFFFFFFFF
+    return (key >> 16) ^ key
+
+
+class Bucket:
+    __slots__ = ('page', 'depth', 'keys', 'records', 'overflow')
+
+    def __init__(self, page, depth, keys, records, overflow=-1):
+        self.page = page
+        self.depth = depth
+        self.keys = keys
+        self.records = records
+        self.overflow = overflow
+
+
+class ExtendibleHashFile:
+    # Hashing extensible: el directorio indexa buckets de una pagina por los ultimos bits del hash
+    # del id. Un bucket lleno se divide (duplicando el directorio si su profundidad local alcanza la
+    # global); solo cuando la profundidad local llega a MAX_DEPTH se usan paginas de desborde.
+    # Una busqueda lee un puntero del directorio y una pagina de bucket.
+    # La eliminacion no fusiona buckets.
+
+    def __init__(self, filename, dirfile=None, nuevo=True, pool=None):
+        self.filename = filename
+        self.dirfile = dirfile if dirfile is not None else filename + '.dir'
+        self.pool = pool if pool is not None else buffer_pool
+        self.session = False
+        self.depth = 0
+        if nuevo or not os.path.exists(filename) or not os.path.exists(self.dirfile):
+            self.pool.invalidate(self.filename)
+            self.pool.invalidate(self.dirfile)
+            with open(self.dirfile, 'wb') as file:
+                file.write(DIR_HEADER_CODEC.pack(0, 1))
+                file.write(POINTER_CODEC.pack(0))
+            with open(self.filename, 'wb') as file:
+                file.write(BUCKET_CODEC.pack(0, 0, -1).ljust(PAGE_SIZE, b'\0'))
+
+    @classmethod
+    def open(cls, filename, dirfile=None, nuevo=False, pool=None):
+        # Sesion: ambos archivos quedan abiertos en el buffer pool hasta close() o el fin del `with`
+        table = cls(filename, dirfile, nuevo, pool)
+        table.session = True
+        return table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self.pool.flush(self.filename)
+        self.pool.flush(self.dirfile)
+
+    def close(self):
+        self.session = False
+        self.pool.release(self.filename)
+        self.pool.release(self.dirfile)
+
+    @contextmanager
+    def operation(self, name=None):
+        self.depth += 1
+        self.pool.begin(operation_name(self, name))  # limite de la operacion logica para el log
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0 and not self.session:
+                self.pool.release(self.filename)
+                self.pool.release(self.dirfile)
+            self.pool.end()
+
+    # Directorio
+
+    def _read_dir_header(self):
+        return list(self.pool.unpack_from(self.dirfile, DIR_HEADER_CODEC, 0))
+
+    def _write_dir_header(self, header):
+        self.pool.write(self.dirfile, 0, DIR_HEADER_CODEC.pack(*header))
+
+    def _entry(self, index):
+        return self.pool.unpack_from(self.dirfile, POINTER_CODEC, DIR_HEADER_CODEC.size + 4 * index)[0]
+
+    def _set_entry(self, index, page):
+        self.pool.write(self.dirfile, DIR_HEADER_CODEC.size + 4 * index, POINTER_CODEC.pack(page))
+
+    def _double_directory(self, header):
+        # La mitad nueva del directorio es una copia de la actual
+        size = 1 << header[0]
+        entries = self.pool.read(self.dirfile, DIR_HEADER_CODEC.size, 4 * size)
+        self.pool.write(self.dirfile, DIR_HEADER_CODEC.size + 4 * size, entries)
+        header[0] += 1
+
+    # Buckets
+
+    def _read(self, page):
+        data = self.pool.read(self.filename, page * PAGE_SIZE, PAGE_SIZE)
+        depth, n, overflow = BUCKET_CODEC.unpack_from(data, 0)
+        offsets = range(BUCKET_HEADER_SIZE, BUCKET_HEADER_SIZE + n * RECORD_SIZE, RECORD_SIZE)
+        keys = [CODEC.key.unpack_from(data, offset)[0] for offset in offsets]
+        records = [data[offset:offset + RECORD_SIZE] for offset in offsets]
+        return Bucket(page, depth, keys, records, overflow)
+
+    def _write(self, bucket):
+        data = bytearray(PAGE_SIZE)
+        BUCKET_CODEC.pack_into(data, 0, bucket.depth, len(bucket.keys), bucket.overflow)
+        data[BUCKET_HEADER_SIZE:BUCKET_HEADER_SIZE + len(bucket.records) * RECORD_SIZE] = b''.join(bucket.records)
+        self.pool.write(self.filename, bucket.page * PAGE_SIZE, data)
+
+    def _chain(self, page):
+        # El bucket y sus paginas de desborde
+        while page != -1:
+            bucket = self._read(page)
+            yield bucket
+            page = bucket.overflow
+
+    def _split(self, header, index, bucket):
+        # Divide el bucket segun el bit `depth` del hash y reparte los punteros del directorio
+        if bucket.depth == header[0]:
+            self._double_directory(header)
+        bit = 1 << bucket.depth
+        new = Bucket(header[1], bucket.depth + 1, [], [])
+        header[1] += 1
+        keys, records = bucket.keys, bucket.records
+        bucket.depth += 1
+        bucket.keys, bucket.records = [], []
+        for key, record in zip(keys, records):
+            target = new if hash_id(key) & bit else bucket
+            target.keys.append(key)
+            target.records.append(record)
+        self._write(bucket)
+        self._write(new)
+        for i in range(index & (bit - 1), 1 << header[0], bit):
+            if i & bit:
+                self._set_entry(i, new.page)
+        self._write_dir_header(header)
+
+    def insert(self, record):
+        with self.operation('insert'):
+            header = self._read_dir_header()
+            h = hash_id(record.id)
+            while True:
+                index = h & ((1 << header[0]) - 1)
+                chain = list(self._chain(self._entry(index)))
+                if any(record.id in bucket.keys for bucket in chain):
+                    print(f"Error: Ya existe un registro con ID : {record.id}")
+                    return
+                for bucket in chain:
+                    if len(bucket.keys) < BUCKET_CAPACITY:
+                        bucket.keys.append(record.id)
+                        bucket.records.append(record.to_bytes())
+                        self._write(bucket)
+                        return
+                first = chain[0]
+                if first.depth < MAX_DEPTH:
+                    self._split(header, index, first)
+                    continue  # se reintenta con el directorio actualizado
+                # Profundidad local agotada: nueva pagina de desborde al final de la cadena
+                overflow = Bucket(header[1], first.depth, [record.id], [record.to_bytes()])
+                header[1] += 1
+                chain[-1].overflow = overflow.page
+                self._write(overflow)
+                self._write(chain[-1])
+                self._write_dir_header(header)
+                return
+
+    def search(self, key):
+        with self.operation('search'):
+            header = self._read_dir_header()
+            for bucket in self._chain(self._entry(hash_id(key) & ((1 << header[0]) - 1))):
+                if key in bucket.keys:
+                    return Venta.from_bytes(bucket.records[bucket.keys.index(key)])
+            return None
+
+    def remove(self, key):
+        with self.operation('remove'):
+            header = self._read_dir_header()
+            for bucket in self._chain(self._entry(hash_id(key) & ((1 << header[0]) - 1))):
+                if key in bucket.keys:
+                    i = bucket.keys.index(key)
+                    del bucket.keys[i]
+                    del bucket.records[i]
+                    self._write(bucket)
+                    return True
+            print(f"Error: No existe un registro con ID : {key}")
+            return False
+
+    def getAllRecords(self):
+        # Recorre las paginas de buckets en orden fisico (sin orden por id)
+        records = []
+        with self.operation('getAllRecords'):
+            for page in range(self._read_dir_header()[1]):
+                records.extend(Venta.from_bytes(data) for data in self._read(page).records)
+        return records
+
+
+if __name__ == "__main__":
+    with ExtendibleHashFile.open("ventas_hash.dat", nuevo=True) as tabla:
+        for id, nombre, cantidad, precio, fecha in cargar_filas_csv("sales_dataset.csv"):
+            tabla.insert(Venta(id, nombre, cantidad, precio, fecha))
+
+        profundidad, paginas = tabla._read_dir_header()
+        print(f"Profundidad global: {profundidad} | Buckets: {paginas}")
+
+        print("\nOperacion search for key:")
+        print(tabla.search(500))
+
+        print("\nOperacion remove:")
+        tabla.remove(500)
+        print(tabla.search(500))
@@ -0,0 +1,169 @@
+import os
+import mmap
+import atexit
+import struct
+import contextlib
+import threading
+from Buffer_Pool import synchronized
+
+GROW_SIZE = 64 * 1024  # crecimiento minimo del mapa al extender el archivo
+
+
+class MmapStore:
+    # Acceso a registros sobre archivos mapeados en memoria, con la misma interfaz que BufferPool.
+    # Las lecturas de registros son struct.unpack_from sobre el mapa: sin seek, sin read y sin
+    # copias intermedias. Al escribir mas alla del final el archivo se extiende (duplicando su
+    # capacidad) y se vuelve a mapear. El mapa se conserva entre operaciones (es compartido, lo
+    # escrito ya esta en el archivo); close(), al cerrar la sesion de la estructura o al salir del
+    # proceso, lo desmapea y recorta el archivo a su tamaño logico. Mientras esta mapeado el archivo
+    # puede tener ceros reservados al final, que las estructuras no leen porque su cabecera cuenta
+    # los registros.
+    # Un archivo no debe usarse a la vez desde este almacen y desde un BufferPool.
+
+    def __init__(self):
+        self.maps = {}   # ruta -> [descriptor, mapa, capacidad]
+        self.sizes = {}  # ruta -> tamaño logico
+        self.paths = {}
+        self.generations = {}  # ruta -> veces que se desmapeo para reescribirlo (ver BufferPool.generation)
+        self.wal = None  # sin log de escritura anticipada
+        self.reads = 0
+        self.writes = 0
+        self.remaps = 0
+        self.lock = threading.RLock()  # un remapeo no debe cerrar un mapa que otro hilo esta leyendo
+        atexit.register(self.close)  # al salir los archivos quedan con su tamaño logico
+
+    def _path(self, name):
+        path = self.paths.get(name)
+        if path is None:
+            path = self.paths[name] = os.path.abspath(name)
+        return path
+
+    def _map(self, path):
+        entry = self.maps.get(path)
+        if entry is None:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+            size = os.fstat(fd).st_size
+            entry = self.maps[path] = [fd, mmap.mmap(fd, size) if size else None, size]
+            self.sizes[path] = size
+        return entry
+
+    def _grow(self, path, entry, end):
+        fd, mm, capacity = entry
+        capacity = max(end, 2 * capacity, GROW_SIZE)
+        if mm is not None:
+            mm.close()
+        os.ftruncate(fd, capacity)
+        entry[1] = mmap.mmap(fd, capacity)
+        entry[2] = capacity
+        self.remaps += 1
+
+    @synchronized
+    def size(self, name):
+        path = self._path(name)
+        self._map(path)
+        return self.sizes[path]
+
+    @synchronized
+    def unpack_from(self, name, codec, offset):
+        # `codec` es un struct.Struct precompilado
+        path = self._path(name)
+        mm = self._map(path)[1]
+        self.reads += 1
+        if mm is None or offset + codec.size > self.sizes[path]:
+            raise struct.error(f"lectura fuera del archivo {name} en la posicion {offset}")
+        return codec.unpack_from(mm, offset)
+
+    @synchronized
+    def read(self, name, offset, size):
+        path = self._path(name)
+        mm = self._map(path)[1]
+        end = min(offset + size, self.sizes[path])
+        if mm is None or offset >= end:
+            return b''
+        self.reads += 1
+        return mm[offset:end]
+
+    @synchronized
+    def write(self, name, offset, data):
+        path = self._path(name)
+        entry = self._map(path)
+        end = offset + len(data)
+        if end > entry[2]:
+            self._grow(path, entry, end)
+        entry[1][offset:end] = data
+        self.writes += 1
+        if end > self.sizes[path]:
+            self.sizes[path] = end
+
+    def begin(self, name=None):
+        pass  # sin log de escritura anticipada: las operaciones no se agrupan
+
+    def end(self):
+        pass
+
+    @contextlib.contextmanager
+    def suspended(self, name=None):
+        yield
+
+    @synchronized
+    def flush(self, name=None):
+        paths = self.maps if name is None else [self._path(name)]
+        for path in paths:
+            entry = self.maps.get(path)
+            if entry is not None and entry[1] is not None:
+                entry[1].flush()
+
+    def _close(self, path, truncate):
+        entry = self.maps.pop(path, None)
+        if entry is None:
+            return
+        fd, mm, capacity = entry
+        if mm is not None:
+            mm.flush()
+            mm.close()
+        if truncate and capacity != self.sizes[path]:
+            os.ftruncate(fd, self.sizes[path])  # se quita el espacio reservado al crecer
+        os.close(fd)
+        self.sizes.pop(path, None)
+
+    def release(self, name):
+        pass  # fin de una operacion: el mapa sigue abierto para las siguientes (ver close)
+
+    @synchronized
+    def close(self, name=None):
+        # Desmapea los archivos (o uno) y les quita el espacio reservado al crecer
+        paths = list(self.maps) if name is None else [self._path(name)]
+        for path in paths:
+            self._close(path, truncate=True)
+
+    @synchronized
+    def invalidate(self, name):
+        # El archivo se va a reescribir por fuera: se desmapea sin tocar su contenido
+        path = self._path(name)
+        self.generations[path] = self.generations.get(path, 0) + 1
+        self._close(path, truncate=False)
+
+    @synchronized
+    def validate(self, name, offset, size):
+        # El mapa compartido ya muestra lo que otros procesos escriben dentro de el; si cambiaron el
+        # tamaño del archivo (lo extendieron o lo reescribieron) se vuelve a mapear
+        path = self._path(name)
+        entry = self.maps.get(path)
+        if entry is not None and os.fstat(entry[0]).st_size != entry[2]:
+            self.invalidate(name)
+
+    def generation(self, name):
+        return self.generations.get(self._path(name), 0)
+
+    @synchronized
+    def stats(self):
+        return {
+            "reads": self.reads,
+            "writes": self.writes,
+            "remaps": self.remaps,
+            "files": len(self.maps),
+        }
+
+
+# Almacen compartido para abrir las estructuras en modo mmap, p. ej. AvlFile.open(ruta, pool=mmap_store)
+mmap_store = MmapStore()
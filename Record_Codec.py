@@ -0,0 +1,44 @@
+import struct
+
+
+class RecordCodec(struct.Struct):
+    # Layout de registro precompilado (struct.Struct), compartido por las estructuras de archivo.
+    # `key` desempaqueta solo el id (primer campo) para las busquedas que solo comparan ids.
+
+    def __init__(self, fmt):
+        super().__init__(fmt)
+        order = fmt[0] if fmt[0] in '@=<>!' else ''
+        self.key = struct.Struct(order + 'i')
+
+
+class LazyText:
+    # Campo de texto de ancho fijo de una Venta. Los registros leidos del disco guardan los bytes
+    # crudos y solo se decodifican en el primer acceso; asi recorrer un arbol comparando ids no
+    # paga decode/strip en cada nodo. La clase debe declarar el slot '_<nombre del campo>'.
+
+    def __init__(self, width, encoding='latin-1'):
+        self.width = width
+        self.encoding = encoding
+
+    def __set_name__(self, owner, name):
+        self.slot = '_' + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if value.__class__ is bytes:
+            value = value.decode(self.encoding).strip()[:self.width].ljust(self.width)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        # bytes: valor crudo del disco (se decodifica despues); str: se normaliza al ancho del campo
+        if value.__class__ is not bytes:
+            value = value[:self.width].ljust(self.width)
+        setattr(obj, self.slot, value)
+
+    def encoded(self, obj):
+        # Bytes para empaquetar el campo, sin decodificar si nunca se leyo
+        value = getattr(obj, self.slot)
+        return value if value.__class__ is bytes else value.encode(self.encoding)
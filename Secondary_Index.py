@@ -0,0 +1,261 @@
+import struct
+import os
+import math
+import heapq
+from contextlib import contextmanager
+from Buffer_Pool import buffer_pool, operation_name
+
+# Cabecera del indice: entradas en la zona ordenada, entradas en la zona de insercion (al final)
+HEADER_CODEC = struct.Struct('<ii')
+HEADER_SIZE = HEADER_CODEC.size
+MIN_DELTA = 32  # capacidad minima de la zona de insercion
+MIN_ID = -2 ** 31
+IO_BUFFER = 1 << 20
+
+
+class SecondaryIndex:
+    # Indice secundario ordenado en disco: entradas (clave, id, activo) de ancho fijo.
+    # Igual que el archivo secuencial, tiene una zona ordenada por (clave, id) que se busca con
+    # busqueda binaria y una zona de insercion sin orden al final del archivo; cuando esta supera
+    # max(MIN_DELTA, sqrt(n)) entradas se mezclan ambas y se reescribe el archivo.
+    # Las eliminaciones en la zona ordenada marcan activo = 0 y se descartan al reconstruir.
+
+    def __init__(self, filename, width, nuevo=False, pool=None):
+        self.filename = filename
+        self.width = width
+        self.codec = struct.Struct(f'<{width}sii')
+        self.pool = pool if pool is not None else buffer_pool
+        self.session = False
+        self.depth = 0
+        if nuevo or not os.path.exists(filename) or os.path.getsize(filename) < HEADER_SIZE:
+            self.build([])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self.pool.flush(self.filename)
+
+    def close(self):
+        self.session = False
+        self.pool.release(self.filename)
+
+    @contextmanager
+    def operation(self, name=None):
+        self.depth += 1
+        self.pool.begin(operation_name(self, name))  # limite de la operacion logica para el log
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0 and not self.session:
+                self.pool.release(self.filename)
+            self.pool.end()
+
+    def normalize(self, key):
+        # Misma forma que el campo en el registro: sin espacios de relleno y truncado al ancho
+        if key.__class__ is not bytes:
+            key = key.strip().encode('latin-1', 'replace')
+        return key.rstrip(b' \0')[:self.width].ljust(self.width, b'\0')
+
+    def _offset(self, pos):
+        return HEADER_SIZE + pos * self.codec.size
+
+    def _header(self):
+        return self.pool.unpack_from(self.filename, HEADER_CODEC, 0)
+
+    def _entry(self, pos):
+        return self.pool.unpack_from(self.filename, self.codec, self._offset(pos))
+
+    def _delta(self, sorted_count, delta_count):
+        # Entradas de la zona de insercion, ordenadas por (clave, id)
+        data = self.pool.read(self.filename, self._offset(sorted_count), delta_count * self.codec.size)
+        return sorted(entry for entry in self.codec.iter_unpack(data) if entry[2])
+
+    def _lower_bound(self, count, key, id):
+        # Primera posicion de la zona ordenada con (clave, id) >= (key, id)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            if (entry[0], entry[1]) < (key, id):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _scan(self, count, lo, hi):
+        # Entradas activas de la zona ordenada con lo <= clave <= hi
+        pos = self._lower_bound(count, lo, MIN_ID)
+        while pos < count:
+            entry = self._entry(pos)
+            if entry[0] > hi:
+                break
+            if entry[2]:
+                yield entry
+            pos += 1
+
+    def insert(self, key, id):
+        with self.operation('insert'):
+            sorted_count, delta_count = self._header()
+            self.pool.write(self.filename, self._offset(sorted_count + delta_count),
+                            self.codec.pack(self.normalize(key), id, 1))
+            self.pool.write(self.filename, 0, HEADER_CODEC.pack(sorted_count, delta_count + 1))
+        if delta_count + 1 > max(MIN_DELTA, math.isqrt(sorted_count)):
+            self.rebuild()
+
+    def remove(self, key, id):
+        key = self.normalize(key)
+        with self.operation('remove'):
+            sorted_count, delta_count = self._header()
+            pos = self._lower_bound(sorted_count, key, id)
+            if pos < sorted_count and self._entry(pos) == (key, id, 1):
+                self.pool.write(self.filename, self._offset(pos), self.codec.pack(key, id, 0))
+                return True
+            # En la zona de insercion la ultima entrada ocupa el lugar de la eliminada
+            for pos in range(sorted_count, sorted_count + delta_count):
+                if self._entry(pos) == (key, id, 1):
+                    last = self._offset(sorted_count + delta_count - 1)
+                    self.pool.write(self.filename, self._offset(pos), self.pool.read(self.filename, last, self.codec.size))
+                    self.pool.write(self.filename, 0, HEADER_CODEC.pack(sorted_count, delta_count - 1))
+                    return True
+        return False
+
+    def range(self, lo, hi):
+        # Ids con lo <= clave <= hi, en orden de (clave, id)
+        lo, hi = self.normalize(lo), self.normalize(hi)
+        with self.operation('range'):
+            sorted_count, delta_count = self._header()
+            delta = [entry for entry in self._delta(sorted_count, delta_count) if lo <= entry[0] <= hi]
+            return [entry[1] for entry in heapq.merge(self._scan(sorted_count, lo, hi), delta)]
+
+    def search(self, key):
+        return self.range(key, key)
+
+    def _entries(self):
+        # Entradas activas de todo el indice en orden de (clave, id)
+        sorted_count, delta_count = self._header()
+        delta = self._delta(sorted_count, delta_count)
+        main = (entry for entry in self.codec.iter_unpack(
+            self.pool.read(self.filename, HEADER_SIZE, sorted_count * self.codec.size)) if entry[2])
+        return heapq.merge(main, delta)
+
+    def _write(self, entries):
+        # Escribe las entradas ordenadas en un temporal y lo intercambia con el indice
+        tmp = self.filename + '.tmp'
+        try:
+            with open(tmp, 'wb', buffering=IO_BUFFER) as out:
+                out.write(bytes(HEADER_SIZE))
+                n = 0
+                for entry in entries:
+                    out.write(self.codec.pack(*entry))
+                    n += 1
+                out.seek(0)
+                out.write(HEADER_CODEC.pack(n, 0))
+                out.flush()
+                os.fsync(out.fileno())
+            self.pool.invalidate(self.filename)
+            os.replace(tmp, self.filename)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def rebuild(self):
+        with self.operation('rebuild'):
+            entries = list(self._entries())
+        self._write(entries)
+
+    def build(self, pairs):
+        # Reemplaza el indice por los pares (clave, id) dados, ordenados en una sola pasada
+        self._write(sorted((self.normalize(key), id, 1) for key, id in pairs))
+
+
+class IndexedFile:
+    # Archivo de ventas (AvlFile o SequentialFile) con indices secundarios por nombre de producto
+    # y por fecha de venta. Las inserciones y eliminaciones deben hacerse a traves de esta clase
+    # para que los indices se mantengan sincronizados; las consultas por nombre o fecha leen solo
+    # los registros que coinciden (una busqueda por id en el archivo base por cada uno).
+
+    def __init__(self, base, prefix=None, nuevo=False, pool=None):
+        # Con nuevo=True (o si faltan los archivos de indice) los indices se construyen desde el archivo base
+        self.base = base
+        prefix = prefix if prefix is not None else base.filename
+        nuevo = nuevo or not (os.path.exists(prefix + '.nombre.idx') and os.path.exists(prefix + '.fecha.idx'))
+        self.nombres = SecondaryIndex(prefix + '.nombre.idx', 30, nuevo, pool)
+        self.fechas = SecondaryIndex(prefix + '.fecha.idx', 10, nuevo, pool)
+        if nuevo:
+            self.reindex()
+
+    def __enter__(self):
+        self.nombres.session = self.fechas.session = True
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.nombres.close()
+        self.fechas.close()
+        if hasattr(self.base, 'close'):
+            self.base.close()
+
+    def _records(self):
+        if hasattr(self.base, 'getAllRecords'):
+            return self.base.getAllRecords()
+        return self.base.search_range(MIN_ID, 2 ** 31 - 1)
+
+    def reindex(self):
+        # Reconstruye ambos indices desde el contenido actual del archivo base
+        records = self._records()
+        self.nombres.build((record.nombre, record.id) for record in records)
+        self.fechas.build((record.fechaVenta, record.id) for record in records)
+
+    def insert(self, record):
+        if self.base.insert(record):
+            self.nombres.insert(record.nombre, record.id)
+            self.fechas.insert(record.fechaVenta, record.id)
+            return True
+        return False
+
+    def remove(self, id):
+        record = self.base.search(id)
+        if record is None:
+            return False
+        if hasattr(self.base, 'delete'):
+            self.base.delete(id)
+        else:
+            self.base.remove(id)
+        self.nombres.remove(record.nombre, id)
+        self.fechas.remove(record.fechaVenta, id)
+        return True
+
+    def search(self, id):
+        return self.base.search(id)
+
+    def _fetch(self, ids):
+        # Con search_many los registros se leen en un solo recorrido del archivo base
+        records = self.base.search_many(ids) if hasattr(self.base, 'search_many') else map(self.base.search, ids)
+        return [record for record in records if record is not None]
+
+    def search_by_name(self, nombre):
+        return self._fetch(self.nombres.search(nombre))
+
+    def range_by_date(self, desde, hasta):
+        # Fechas en formato AAAA-MM-DD: el orden de los textos es el orden cronologico
+        return self._fetch(self.fechas.range(desde, hasta))
+
+
+if __name__ == "__main__":
+    from AVL_File import AvlFile
+
+    with IndexedFile(AvlFile.open("ventas.dat", "sales_dataset_prueba.csv"), "ventas", nuevo=True) as ventas:
+        print("Operacion search by name:")
+        for venta in ventas.search_by_name("Power Bank Solar"):
+            print(venta)
+
+        print("\nOperacion range by date:")
+        for venta in ventas.range_by_date("2024-05-01", "2024-06-01"):
+            print(venta)
@@ -3,30 +3,57 @@ import os
 import csv
 import time
 import random
+import math
+import heapq
+import tempfile
+from bisect import bisect_left
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from Buffer_Pool import buffer_pool, operation_name, PagedFile
+from Record_Codec import RecordCodec, LazyText
 
 FORMAT = "<i30sif10si1si"
 RECORD_SIZE = struct.calcsize(FORMAT)
+CODEC = RecordCodec(FORMAT)  # formato precompilado, CODEC.key lee solo el id
+INDEX_CODEC = struct.Struct('<i')
+ENTRY_SIZE = 4 + RECORD_SIZE  # indice fisico + registro
+INDICE_OFFSET = struct.calcsize("<i30sif10s")  # posicion de indice/filetype dentro del registro
+ACTIVO_OFFSET = struct.calcsize("<i30sif10si1s")
+NO_LINK = struct.pack('<i1s', -1, b'd')
+NO_INDEX = INDEX_CODEC.pack(-1)
+
+# Cabecera del archivo principal: k minimo, capacidad del auxiliar, registros en el auxiliar, fraccion,
+# primer registro de la cadena inicial del auxiliar (ids menores al primero del principal, -1 si no hay)
+HEADER_FORMAT = "<iiifi"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_CODEC = struct.Struct(HEADER_FORMAT)
+
+RUN_SIZE = 100000  # registros del auxiliar que se ordenan en memoria por corrida
+IO_BUFFER = 1 << 20  # bytes de buffer para lecturas y escrituras secuenciales
 
 class Venta:
+    # nombre y fechaVenta se decodifican recien al accederlos (ver LazyText)
+    __slots__ = ('id', '_nombre', 'cantidad', 'precio', '_fechaVenta', 'indice', 'filetype', 'activo')
+    nombre = LazyText(30, 'latin1')
+    fechaVenta = LazyText(10, 'latin1')
+
     def __init__(self, id, nombre, cantidad, precio, fechaVenta, indice=-1, filetype='d', activo=1):
         self.id = id
-        self.nombre = nombre[:30].ljust(30)
+        self.nombre = nombre
         self.cantidad = cantidad
         self.precio = precio
-        self.fechaVenta = fechaVenta[:10].ljust(10)
+        self.fechaVenta = fechaVenta
         self.indice = indice
         self.filetype = filetype
         self.activo = activo
 
     def to_bytes(self):
-        return struct.pack(
-            FORMAT,
+        return CODEC.pack(
             self.id,
-            self.nombre.encode('latin1'),
+            Venta.nombre.encoded(self),
             self.cantidad,
             self.precio,
-            self.fechaVenta.encode('latin1'),
+            Venta.fechaVenta.encoded(self),
             int(self.indice),
             self.filetype.encode('latin1'),
             self.activo
@@ -34,170 +61,378 @@ class Venta:
 
     @staticmethod
     def from_bytes(data):
-        id, nombre, cantidad, precio, fechaVenta, indice, filetype, activo = struct.unpack(FORMAT, data)
+        return Venta.from_fields(CODEC.unpack(data))
+
+    @staticmethod
+    def from_fields(fields):
+        id, nombre, cantidad, precio, fechaVenta, indice, filetype, activo = fields
         return Venta(
             id,
-            nombre.decode('latin1').strip(),
+            nombre,  # bytes crudos, se decodifican al primer acceso
             cantidad,
             precio,
-            fechaVenta.decode('latin1').strip(),
+            fechaVenta,
             indice,
             filetype.decode('latin1').strip(),
             activo
         )
 
 class SequentialFile:
-    def __init__(self, filename, auxfile, k):
+    def __init__(self, filename, auxfile, k=10, fraction=0.05, pool=None):
+        # Politica del auxiliar: capacidad = max(k, fraction * n), cada reconstruccion O(n) se reparte entre
+        # fraction * n inserciones (O(1 / fraction) amortizado). Con fraction = 0 la capacidad es
+        # max(k, log2(n)), que ocupa menos auxiliar pero cuesta O(n / log n) amortizado por insercion
+        # Se guarda en la cabecera, si el archivo ya existe manda la politica persistida
         self.filename = filename
         self.auxfile = auxfile
-        self.k = k  # límite del auxiliar
-        if not os.path.exists(self.filename):
-            open(self.filename, 'wb').close()
+        self.pool = pool if pool is not None else buffer_pool  # E/S de registros a traves del buffer pool
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) < HEADER_SIZE:
+            self.pool.invalidate(self.filename)
+            self.pool.invalidate(self.auxfile)
+            with open(self.filename, 'wb') as file:
+                file.write(struct.pack(HEADER_FORMAT, k, k, 0, fraction, -1))
+            open(self.auxfile, 'wb').close()
         if not os.path.exists(self.auxfile):
+            self.pool.invalidate(self.auxfile)
             open(self.auxfile, 'wb').close()
+        with self._open(self.filename, '__init__') as file:
+            self.k, _, _, self.fraction, _ = self._read_header(file)
+
+    @contextmanager
+    def _open(self, name, operation=None):
+        # Archivo visto a traves del buffer pool; al terminar se vuelcan sus paginas modificadas
+        self.pool.begin(operation_name(self, operation))  # limite de la operacion logica para el log
+        try:
+            yield PagedFile(self.pool, name)
+        finally:
+            self.pool.release(name)
+            self.pool.end()
+
+    def _read_header(self, file):
+        file.seek(0)
+        return list(HEADER_CODEC.unpack(file.read(HEADER_SIZE)))
+
+    def _write_header(self, file, capacity, aux_count, head=-1):
+        file.seek(0)
+        file.write(HEADER_CODEC.pack(self.k, capacity, aux_count, self.fraction, head))
+
+    def _head(self, file):
+        # Inicio de la cadena inicial del auxiliar
+        return self._read_header(file)[4]
+
+    def _capacity(self, n):
+        # Capacidad del auxiliar para un principal de n registros, recalculada en cada reconstruccion
+        if self.fraction > 0:
+            return max(self.k, math.ceil(n * self.fraction))
+        return max(self.k, int(math.log2(n)) if n > 1 else 0)
+
+    def _offset(self, pos):
+        return HEADER_SIZE + pos * ENTRY_SIZE
 
     def insert(self, record: Venta):
-        inserted = False
-        with open(self.filename, 'r+b') as file:
-            file.seek(0)
-            pos = 0
-            while True:
-                current_pos = file.tell()
-                index_data = file.read(4)
-                data = file.read(RECORD_SIZE)
-                if not index_data or not data:
-                    break
-
-                index = struct.unpack('<i', index_data)[0]
-                current = Venta.from_bytes(data)
-
-                next_pos = file.tell()
-                next_index_data = file.read(4)
-                next_data = file.read(RECORD_SIZE)
-
-                if not next_index_data or not next_data:
-                    break
-
-                next_index = struct.unpack('<i', next_index_data)[0]
-                next_record = Venta.from_bytes(next_data)
-
-                if current.id < record.id < next_record.id:
-                    if self.k == 0:
-                        self.rebuild()
-                        self.insert(record)
-                        return
-                    else:
-                        with open(self.auxfile, 'ab') as aux:
-                            aux_index = aux.tell() // (4 + RECORD_SIZE)
-                            aux.write(struct.pack('<i', -1))
-                            aux.write(record.to_bytes())
-                            # Actualizar punteros lógicos
-                            current.indice = aux_index
-                            current.filetype = 'a'
-                            file.seek(current_pos + 4)  # después del índice
-                            file.write(current.to_bytes())
-                            self.k -= 1
-                            inserted = True
-                            break
-
-                file.seek(next_pos)
-
-            if not inserted:
+        with self._open(self.filename, 'insert') as file:
+            count = self._count(file)
+            # Camino rapido: archivo vacio o id mayor al ultimo, se agrega al final sin buscar
+            if count == 0 or self._read_id(file, count - 1) < record.id:
                 file.seek(0, os.SEEK_END)
-                file.write(struct.pack('<i', -1))
+                file.write(NO_INDEX)
                 file.write(record.to_bytes())
-
-    def rebuild(self):
-        registros = []
-        # Leer archivo principal
-        with open(self.filename, 'rb') as file:
-            while True:
-                index_data = file.read(4)
-                if not index_data:
-                    break
-                data = file.read(RECORD_SIZE)
-                if not data:
+                return True
+
+            pos = self._binary_search(file, record.id)
+            if pos != -1:
+                current = self._read_record(file, pos)
+                if current.id == record.id:
+                    if current.activo == 1:
+                        print(f"Error: Ya existe un registro con ID : {record.id}")
+                        return False
+                    # Se reutiliza la posicion del registro eliminado conservando su puntero al auxiliar
+                    record.indice = current.indice
+                    record.filetype = current.filetype
+                    file.seek(self._offset(pos) + 4)
+                    file.write(record.to_bytes())
+                    return True
+            else:
+                current = None  # id menor al primero: va a la cadena inicial, que cuelga de la cabecera
+            inserted = self._insert_aux(file, pos, current, record)
+            if inserted is not None:
+                return inserted
+
+        # Auxiliar lleno: se agrega al auxiliar y se reconstruye el archivo
+        with self._open(self.auxfile, 'insert') as aux:
+            aux.seek(0, os.SEEK_END)
+            aux.write(NO_INDEX)
+            aux.write(record.to_bytes())
+        self.rebuild()
+        return True
+
+    def _insert_aux(self, file, pos, current, record):
+        # Recorre la cadena ordenada que cuelga de `current` (o de la cabecera si es None) hasta el
+        # predecesor del nuevo registro. Devuelve si se inserto, o None si el auxiliar esta lleno
+        with self._open(self.auxfile) as aux:
+            _, capacity, aux_count, _, head = self._read_header(file)
+            if current is None:
+                prev, next_index = None, head
+            else:
+                prev, prev_file, prev_pos = current, file, self._offset(pos)
+                next_index = current.indice if current.filetype == 'a' else -1
+            while next_index != -1:
+                reg = self._unpack(aux, next_index * ENTRY_SIZE + 4)
+                if reg.id == record.id:
+                    if reg.activo == 1:
+                        print(f"Error: Ya existe un registro con ID : {record.id}")
+                        return False
+                    record.indice = reg.indice
+                    record.filetype = reg.filetype
+                    aux.seek(next_index * ENTRY_SIZE + 4)
+                    aux.write(record.to_bytes())
+                    return True
+                if reg.id > record.id:
                     break
-                reg = Venta.from_bytes(data)
-                if reg.activo == 1:
-                    registros.append(reg)
-
-        # Leer archivo auxiliar
-        with open(self.auxfile, 'rb') as aux:
+                prev, prev_file, prev_pos = reg, aux, next_index * ENTRY_SIZE
+                next_index = reg.indice if reg.filetype == 'a' else -1
+
+            if aux_count >= capacity:
+                return None  # auxiliar lleno, hay que reconstruir
+
+            # El nuevo registro apunta al sucesor y el predecesor pasa a apuntar al nuevo
+            aux.seek(0, os.SEEK_END)
+            aux_index = aux.tell() // ENTRY_SIZE
+            record.indice = next_index
+            record.filetype = 'a' if next_index != -1 else 'd'
+            aux.write(NO_INDEX)
+            aux.write(record.to_bytes())
+
+            if prev is None:
+                head = aux_index
+            else:
+                prev.indice = aux_index
+                prev.filetype = 'a'
+                prev_file.seek(prev_pos + 4)  # después del índice
+                prev_file.write(prev.to_bytes())
+            self._write_header(file, capacity, aux_count + 1, head)
+            return True
+
+    def _read_run(self, path, start=0):
+        # Genera (id, registro) de los registros activos de un archivo, leyendolo secuencialmente
+        with open(path, 'rb', buffering=IO_BUFFER) as f:
+            f.seek(start)
             while True:
-                index_data = aux.read(4)
-                if not index_data:
-                    break
-                data = aux.read(RECORD_SIZE)
-                if not data:
+                entry = f.read(ENTRY_SIZE)
+                if len(entry) < ENTRY_SIZE:
                     break
-                reg = Venta.from_bytes(data)
-                if reg.activo == 1:
-                    registros.append(reg)
-
-        # Ordenar registros
-        registros.sort(key=lambda r: r.id)
-
-        # Reescribir archivo principal
-        with open(self.filename, 'wb') as file:
-            for reg in registros:
-                reg.indice = -1
-                reg.filetype = 'd'
-                file.write(struct.pack('<i', -1))
-                file.write(reg.to_bytes())
+                if INDEX_CODEC.unpack_from(entry, 4 + ACTIVO_OFFSET)[0] == 1:
+                    yield CODEC.key.unpack_from(entry, 4)[0], entry[4:]
+
+    def _write_run(self, run):
+        fd, path = tempfile.mkstemp(suffix='.run', dir=os.path.dirname(os.path.abspath(self.filename)))
+        with os.fdopen(fd, 'wb', buffering=IO_BUFFER) as f:
+            for _, data in run:
+                f.write(NO_INDEX)
+                f.write(data)
+        return path
+
+    def _sorted_aux_runs(self):
+        # Ordena el auxiliar por bloques de RUN_SIZE; si no entra en memoria se vuelca cada bloque a disco
+        runs, paths = [], []
+        run = []
+        for item in self._read_run(self.auxfile):
+            run.append(item)
+            if len(run) == RUN_SIZE:
+                run.sort()
+                paths.append(self._write_run(run))
+                run = []
+        run.sort()
+        if paths:
+            if run:
+                paths.append(self._write_run(run))
+            runs = [self._read_run(path) for path in paths]
+        elif run:
+            runs = [iter(run)]
+        return runs, paths
+
+    def _write_main(self, items):
+        # Escribe los (id, registro) ya ordenados en un temporal y lo intercambia con el principal
+        tmp = self.filename + '.tmp'
+        try:
+            with open(tmp, 'wb', buffering=IO_BUFFER) as out:
+                out.write(bytes(HEADER_SIZE))  # se completa al final, cuando se conoce n
+                n = 0
+                last_id = None
+                for id, data in items:
+                    if id == last_id:
+                        continue  # id repetido (o copia de una reconstruccion interrumpida)
+                    last_id = id
+                    out.write(NO_INDEX)
+                    out.write(data[:INDICE_OFFSET])
+                    out.write(NO_LINK)
+                    out.write(data[ACTIVO_OFFSET:])
+                    n += 1
+                self._write_header(out, self._capacity(n), 0)
+                out.flush()
+                os.fsync(out.fileno())
+            self.pool.invalidate(self.filename)
+            os.replace(tmp, self.filename)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
 
         # Vaciar auxiliar
+        self.pool.invalidate(self.auxfile)
         open(self.auxfile, 'wb').close()
-        self.k = 10  # reinicia el contador del auxiliar a su valor máximo
 
-                                    
+    def rebuild(self):
+        # Mezcla externa: el principal ya esta ordenado, solo se ordena el auxiliar (por corridas).
+        # Ambos se leen sin pasar por el pool, antes se vuelcan sus paginas
+        self.pool.flush(self.filename)
+        self.pool.flush(self.auxfile)
+        runs, paths = self._sorted_aux_runs()
+        try:
+            main = self._read_run(self.filename, HEADER_SIZE)
+            self._write_main(heapq.merge(main, *runs, key=lambda item: item[0]))
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    def bulk_load(self, ventas):
+        # Reemplaza el contenido por las ventas dadas: se ordenan una vez y se escriben en una sola pasada.
+        # De un id repetido queda la primera venta y se informan las demas, como en AvlFile y BSTFile
+        items = sorted(((venta.id, venta.to_bytes()) for venta in ventas), key=lambda item: item[0])
+        unicos = []
+        for id, data in items:
+            if unicos and unicos[-1][0] == id:
+                print(f"Error: Ya existe un registro con ID : {id}")
+                continue
+            unicos.append((id, data))
+        self._write_main(unicos)
+
+    def _count(self, file):
+        file.seek(0, os.SEEK_END)
+        return (file.tell() - HEADER_SIZE) // ENTRY_SIZE
+
+    def _read_id(self, file, pos):
+        # Solo se lee el id (primer campo del registro), sin desempaquetar la Venta completa
+        return self.pool.unpack_from(self.filename, CODEC.key, self._offset(pos) + 4)[0]
+
+    def _read_record(self, file, pos):
+        return self._unpack(file, self._offset(pos) + 4)
+
+    def _unpack(self, file, offset):
+        # Registro desempaquetado directamente desde la pagina en cache (cuenta en los unpacks del pool)
+        return Venta.from_fields(self.pool.unpack_from(file.name, CODEC, offset))
+
+    def _binary_search(self, file, id, lo=0, hi=None):
+        # Posicion del ultimo registro del archivo principal con id <= id buscado (-1 si no existe).
+        # Con `lo` se busca desde esa posicion (la anterior ya se sabe menor o igual) y hasta `hi`
+        hi = self._count(file) - 1 if hi is None else hi
+        pos = lo - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if self._read_id(file, mid) <= id:
+                pos = mid
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return pos
+
+    def _gallop_search(self, file, id, start, n):
+        # Como _binary_search desde `start`, pero el limite superior se busca duplicando el salto:
+        # con claves crecientes cada busqueda cuesta O(log distancia) lecturas en vez de O(log n)
+        if start >= n or self._read_id(file, start) > id:
+            return self._binary_search(file, id, 0, start - 1)
+        paso = 1
+        while start + paso < n and self._read_id(file, start + paso) <= id:
+            start += paso
+            paso *= 2
+        return self._binary_search(file, id, start + 1, min(start + paso, n) - 1)
 
     def search(self, id):
-        with open(self.filename, 'rb') as file:
-            while True:
-                index_data = file.read(4)
-                data = file.read(RECORD_SIZE)
-                if not data:
-                    break
-                reg = Venta.from_bytes(data)
-                if reg.id == id and reg.activo == 1:
-                    return reg
-                # Si hay un puntero al auxiliar, seguimos buscando
-                if reg.indice != -1 and reg.filetype == 'a':
-                    found = self._search_aux(id, reg.indice)
-                    if found:
-                        return found
+        with self._open(self.filename, 'search') as file:
+            pos = self._binary_search(file, id)
+            if pos == -1:
+                head = self._head(file)
+                return self._search_aux(id, head) if head != -1 else None
+            reg = self._read_record(file, pos)
+            if reg.id == id and reg.activo == 1:
+                return reg
+            # Si hay un puntero al auxiliar, el registro solo puede estar en esa cadena
+            if reg.indice != -1 and reg.filetype == 'a':
+                return self._search_aux(id, reg.indice)
         return None
 
     def _search_aux(self, id, start_index):
-        with open(self.auxfile, 'rb') as aux:
+        with self._open(self.auxfile) as aux:
             current_index = start_index
             while current_index != -1:
-                pos = current_index * (4 + RECORD_SIZE)
-                aux.seek(pos)
-                index_data = aux.read(4)
-                data = aux.read(RECORD_SIZE)
-                if not data:
-                    break
-                reg = Venta.from_bytes(data)
+                reg = self._unpack(aux, current_index * ENTRY_SIZE + 4)
+                if reg.id > id:
+                    break  # la cadena esta ordenada, el id ya no puede aparecer
                 if reg.id == id and reg.activo == 1:
                     return reg
                 current_index = reg.indice if reg.filetype == 'a' else -1
         return None
 
 
+    def search_many(self, ids):
+        # Busca varios ids en una sola pasada: las claves ordenadas se cruzan con el principal (cada
+        # busqueda avanza a saltos desde donde termino la anterior) y las que caen en el mismo registro
+        # recorren juntas su cadena del auxiliar, que tambien esta ordenada. Ambos archivos se abren
+        # una vez. Devuelve los registros en el orden de `ids` (None para los que no existen)
+        ids = list(ids)
+        claves = sorted(set(ids))
+        encontrados = {}
+        with self._open(self.filename, 'search_many') as file, self._open(self.auxfile) as aux:
+            n = self._count(file)
+            # Las claves menores al primero del principal solo pueden estar en la cadena inicial
+            i = bisect_left(claves, self._read_id(file, 0)) if n else len(claves)
+            head = self._head(file)
+            if i and head != -1:
+                self._search_aux_many(aux, claves[:i], head, encontrados)
+            pos = 0
+            while i < len(claves):
+                pos = self._gallop_search(file, claves[i], pos, n)
+                if pos == -1:
+                    i += 1  # menor que todo el principal, como en search
+                    pos = 0
+                    continue
+                # Claves que caen en este registro: hasta el id del siguiente del principal
+                siguiente = self._read_id(file, pos + 1) if pos + 1 < n else None
+                j = i
+                while j < len(claves) and (siguiente is None or claves[j] < siguiente):
+                    j += 1
+                reg = self._read_record(file, pos)
+                if reg.id == claves[i] and reg.activo == 1:
+                    encontrados[reg.id] = reg
+                if reg.indice != -1 and reg.filetype == 'a':
+                    self._search_aux_many(aux, claves[i:j], reg.indice, encontrados)
+                i = j
+        return [encontrados.get(id) for id in ids]
+
+    def _search_aux_many(self, aux, claves, start_index, encontrados):
+        # Cruza las claves ordenadas con la cadena ordenada del auxiliar en un solo recorrido
+        current_index = start_index
+        i = 0
+        while current_index != -1 and i < len(claves):
+            reg = self._unpack(aux, current_index * ENTRY_SIZE + 4)
+            while i < len(claves) and claves[i] < reg.id:
+                i += 1
+            if i < len(claves) and claves[i] == reg.id and reg.activo == 1:
+                encontrados[reg.id] = reg
+            current_index = reg.indice if reg.filetype == 'a' else -1
+
     def delete(self, id):
-        with open(self.filename, 'r+b') as file:
-            while True:
-                pos = file.tell()
-                index_data = file.read(4)
-                data = file.read(RECORD_SIZE)
-                if not data:
-                    break
-                reg = Venta.from_bytes(data)
+        with self._open(self.filename, 'delete') as file:
+            pos = self._binary_search(file, id)
+            if pos == -1:
+                # Menor al primero del principal: solo puede estar en la cadena inicial
+                head = self._head(file)
+                if head != -1 and self._delete_aux(id, head):
+                    return True
+            else:
+                reg = self._read_record(file, pos)
                 if reg.id == id and reg.activo == 1:
                     reg.activo = 0
-                    file.seek(pos + 4)
+                    file.seek(self._offset(pos) + 4)
                     file.write(reg.to_bytes())
                     print(f"Registro con ID {id} eliminado del archivo principal.")
                     return True
@@ -210,16 +445,13 @@ class SequentialFile:
         return False
 
     def _delete_aux(self, id, start_index):
-        with open(self.auxfile, 'r+b') as aux:
+        with self._open(self.auxfile) as aux:
             current_index = start_index
             while current_index != -1:
-                pos = current_index * (4 + RECORD_SIZE)
-                aux.seek(pos)
-                index_data = aux.read(4)
-                data = aux.read(RECORD_SIZE)
-                if not data:
+                pos = current_index * ENTRY_SIZE
+                reg = self._unpack(aux, pos + 4)
+                if reg.id > id:
                     break
-                reg = Venta.from_bytes(data)
                 if reg.id == id and reg.activo == 1:
                     reg.activo = 0
                     aux.seek(pos + 4)
@@ -231,34 +463,48 @@ class SequentialFile:
 
 
     def search_range(self, min_id, max_id):
-        resultados = []
-        with open(self.filename, 'rb') as file:
-            while True:
-                index_data = file.read(4)
-                data = file.read(RECORD_SIZE)
-                if not data:
-                    break
-                reg = Venta.from_bytes(data)
-                if reg.activo == 1 and min_id <= reg.id <= max_id:
-                    resultados.append(reg)
+        with self._open(self.filename, 'search_range'):  # una sola operacion para todo el recorrido
+            return list(self.cursor(min_id, max_id))
+
+    def cursor(self, min_id=-2**31, max_id=2**31 - 1, limit=None):
+        # Generador de los registros activos con min_id <= id <= max_id en orden de id (como mucho
+        # `limit`), leyendo el principal y las cadenas del auxiliar a medida que se piden.
+        # Para continuar despues del ultimo registro recibido, otro cursor desde ultimo.id + 1
+        with self._open(self.filename, 'cursor') as file:
+            # Se empieza en el predecesor de min_id, su cadena auxiliar puede tener ids dentro del rango.
+            # Si min_id es menor al primero del principal, antes va la cadena inicial
+            pos = self._binary_search(file, min_id)
+            head = self._head(file)
+            if pos == -1 and head != -1:
+                for reg in self._search_aux_range(min_id, max_id, head)[:limit]:
+                    with self.pool.suspended(operation_name(self, 'cursor')):
+                        yield reg
+                    if limit is not None:
+                        limit -= 1
+            pos = max(pos, 0)
+            while limit != 0 and pos < self._count(file):
+                reg = self._read_record(file, pos)
+                pos += 1
+                if reg.id > max_id:
+                    break  # archivo ordenado: ni este registro ni su cadena pueden estar en el rango
+                encontrados = [reg] if reg.activo == 1 and min_id <= reg.id <= max_id else []
                 # Buscar en auxiliar si hay puntero
                 if reg.indice != -1 and reg.filetype == 'a':
-                    aux_regs = self._search_aux_range(min_id, max_id, reg.indice)
-                    resultados.extend(aux_regs)
-        return resultados
+                    encontrados.extend(self._search_aux_range(min_id, max_id, reg.indice))
+                for reg in encontrados[:limit]:
+                    with self.pool.suspended(operation_name(self, 'cursor')):
+                        yield reg
+                if limit is not None:
+                    limit -= min(limit, len(encontrados))
 
     def _search_aux_range(self, min_id, max_id, start_index):
         encontrados = []
-        with open(self.auxfile, 'rb') as aux:
+        with self._open(self.auxfile) as aux:
             current_index = start_index
             while current_index != -1:
-                pos = current_index * (4 + RECORD_SIZE)
-                aux.seek(pos)
-                index_data = aux.read(4)
-                data = aux.read(RECORD_SIZE)
-                if not data:
+                reg = self._unpack(aux, current_index * ENTRY_SIZE + 4)
+                if reg.id > max_id:
                     break
-                reg = Venta.from_bytes(data)
                 if reg.activo == 1 and min_id <= reg.id <= max_id:
                     encontrados.append(reg)
                 current_index = reg.indice if reg.filetype == 'a' else -1
@@ -282,9 +528,6 @@ def cargar_ventas_csv(ruta_csv):
     return ventas
 
 
-if os.path.exists("ventas.dat"):
-    os.remove("ventas.dat")
-
 def probar_tiempos_con_csv():
     # Eliminar archivos anteriores
     if os.path.exists("ventas_1000.dat"):
@@ -317,6 +560,12 @@ def probar_tiempos_con_csv():
     resultado = sf.search(target_id)
     t_search = (time.time() - t0) * 1000
 
+    # Búsqueda de varios ids en una pasada
+    ids_lote = [venta.id for venta in ventas[::10]]
+    t0 = time.time()
+    sf.search_many(ids_lote)
+    t_many = (time.time() - t0) * 1000
+
     # Búsqueda por rango
     t0 = time.time()
     resultados_rango = sf.search_range(rango_min, rango_max)
@@ -332,13 +581,23 @@ def probar_tiempos_con_csv():
     sf.rebuild()
     t_rebuild = (time.time() - t0) * 1000
 
+    # Carga masiva
+    t0 = time.time()
+    sf.bulk_load(ventas)
+    t_bulk = (time.time() - t0) * 1000
+
     # Resultados
     print(f"\n📊 Resultados de tiempo con CSV real:")
     print(f"🟢 Inserción total de {len(ventas)} registros: {t_insert:.3f} ms")
     print(f"🔍 Búsqueda por ID ({target_id}): {t_search:.3f} ms")
+    print(f"🔍 Búsqueda de {len(ids_lote)} IDs con search_many: {t_many:.3f} ms")
     print(f"🔎 Búsqueda por rango ({rango_min}–{rango_max}): {t_range:.3f} ms")
     print(f"🗑 Eliminación por ID ({target_id}): {t_delete:.3f} ms")
     print(f"♻️ Reconstrucción completa: {t_rebuild:.3f} ms")
+    print(f"📦 Carga masiva de {len(ventas)} registros: {t_bulk:.3f} ms")
 
 # Ejecutar prueba
-probar_tiempos_con_csv()
\ No newline at end of file
+if __name__ == "__main__":
+    if os.path.exists("ventas.dat"):
+        os.remove("ventas.dat")
+    probar_tiempos_con_csv()
\ No newline at end of file
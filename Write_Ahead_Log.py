@@ -0,0 +1,120 @@
+import os
+import struct
+import zlib
+
+# Registro del log: tipo, largo de la ruta, posicion en el archivo, largo de los datos; luego la ruta,
+# los datos y el CRC32 de todo lo anterior
+RECORD_CODEC = struct.Struct('<BHqI')
+CRC_CODEC = struct.Struct('<I')
+PAGE = 1
+COMMIT = 2
+
+GROUP_SIZE = 256  # operaciones por commit (un fsync por grupo)
+CHECKPOINT_BYTES = 64 * 1024 * 1024  # tamaño del log a partir del cual se sincronizan los datos y se vacia
+
+
+class WriteAheadLog:
+    # Log de escritura anticipada (solo rehacer) para el BufferPool: por cada grupo de operaciones
+    # terminadas se agregan las imagenes de sus paginas modificadas y un registro de commit, con un
+    # solo fsync, y recien despues las paginas se escriben en los archivos de datos. Al abrirlo se
+    # reproducen los grupos con commit completo, asi una caida entre las escrituras de una rotacion
+    # o de una insercion en el auxiliar nunca deja la estructura a medias.
+    # Uso: buffer_pool.use_wal(WriteAheadLog("ventas.wal"))
+
+    def __init__(self, path, group_size=GROUP_SIZE, checkpoint_bytes=CHECKPOINT_BYTES):
+        self.path = path
+        self.group_size = group_size
+        self.checkpoint_bytes = checkpoint_bytes
+        self.paths = set()  # archivos con paginas en el log desde el ultimo checkpoint
+        self.commits = 0
+        self.replayed = self.replay()
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+        self.size = os.fstat(self.fd).st_size
+
+    def replay(self):
+        # Aplica los grupos con registro de commit y CRC validos; lo que sigue al primer registro
+        # incompleto o corrupto es un commit interrumpido y se descarta. Devuelve los archivos tocados
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        pos = 0
+        group = []
+        fds = {}
+        try:
+            while pos + RECORD_CODEC.size <= len(data):
+                kind, name_size, offset, size = RECORD_CODEC.unpack_from(data, pos)
+                body = pos + RECORD_CODEC.size
+                end = body + name_size + size
+                if end + CRC_CODEC.size > len(data) or zlib.crc32(data[pos:end]) != CRC_CODEC.unpack_from(data, end)[0]:
+                    break
+                if kind == PAGE:
+                    group.append((data[body:body + name_size].decode(), offset, data[body + name_size:end]))
+                elif kind == COMMIT:
+                    for path, offset, page in group:
+                        fd = fds.get(path)
+                        if fd is None:
+                            fd = fds[path] = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+                        os.pwrite(fd, page, offset)
+                    group = []
+                else:
+                    break
+                pos = end + CRC_CODEC.size
+            for fd in fds.values():
+                os.fsync(fd)
+        finally:
+            for fd in fds.values():
+                os.close(fd)
+        with open(self.path, 'wb') as f:  # todo lo reproducido ya esta en los archivos de datos
+            os.fsync(f.fileno())
+        return sorted(fds)
+
+    def _record(self, kind, path=b'', offset=0, data=b''):
+        record = RECORD_CODEC.pack(kind, len(path), offset, len(data)) + path + data
+        return record + CRC_CODEC.pack(zlib.crc32(record))
+
+    def append(self, pages):
+        # Un grupo: las paginas (ruta, posicion, bytes) y su commit, en una escritura y un fsync
+        out = bytearray()
+        for path, offset, data in pages:
+            out += self._record(PAGE, path.encode(), offset, data)
+            self.paths.add(path)
+        out += self._record(COMMIT)
+        view = memoryview(out)
+        while view:
+            view = view[os.write(self.fd, view):]
+        os.fsync(self.fd)
+        self.size += len(out)
+        self.commits += 1
+
+    def truncate(self):
+        os.ftruncate(self.fd, 0)
+        os.fsync(self.fd)
+        self.size = 0
+        self.paths.clear()
+
+    def close(self):
+        os.close(self.fd)
+
+    def stats(self):
+        return {"commits": self.commits, "bytes": self.size, "files": len(self.paths)}
+
+
+if __name__ == "__main__":
+    import time
+    from Buffer_Pool import buffer_pool
+    from AVL_File import AvlFile
+
+    for ruta in ("ventas_wal.dat", "ventas.wal"):
+        if os.path.exists(ruta):
+            os.remove(ruta)
+    buffer_pool.use_wal(WriteAheadLog("ventas.wal"))
+    with AvlFile.open("ventas_wal.dat") as avlFile:
+        ventas = list(avlFile.readCsv("sales_dataset.csv"))
+        t0 = time.perf_counter()
+        for venta in ventas:
+            avlFile.insert(venta)
+        avlFile.flush()
+        segundos = time.perf_counter() - t0
+    print(f"{len(ventas)} inserciones durables en {segundos:.3f} s ({len(ventas) / segundos:.0f} por segundo)")
+    print(buffer_pool.wal.stats())
@@ -0,0 +1,45 @@
+import os
+import sys
+import subprocess
+import importlib.util
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def cargar_bst():
+    # BST File.py tiene un espacio en el nombre y no se puede importar directamente
+    modulo = sys.modules.get("BST_File")
+    if modulo is None:
+        spec = importlib.util.spec_from_file_location("BST_File", os.path.join(RAIZ, "BST File.py"))
+        modulo = sys.modules["BST_File"] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    # Cada prueba trabaja en su propia carpeta. El pool recuerda la ruta absoluta de cada nombre,
+    # asi que las pruebas usan rutas absolutas (carpeta / nombre)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def otro_proceso(carpeta):
+    # Ejecuta codigo en un interprete aparte sobre la misma carpeta y devuelve su salida.
+    # Con esperar=False devuelve el proceso en marcha y su salida se pide con terminar(proceso)
+    def ejecutar(codigo, esperar=True):
+        entorno = dict(os.environ, PYTHONPATH=RAIZ)
+        prefijo = f"import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); from conftest import cargar_bst\n"
+        proceso = subprocess.Popen([sys.executable, "-c", prefijo + codigo], cwd=carpeta, env=entorno,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        return terminar(proceso) if esperar else proceso
+    return ejecutar
+
+
+def terminar(proceso):
+    salida, errores = proceso.communicate(timeout=300)
+    assert proceso.returncode == 0, errores
+    return salida
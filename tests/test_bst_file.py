@@ -0,0 +1,47 @@
+import os
+import struct
+from AVL_File import AvlFile, Venta
+from conftest import cargar_bst
+
+BST = cargar_bst()
+
+
+def venta(id):
+    return BST.Venta(id, "Producto", 1, 1.0, "2024-01-01")
+
+
+def test_rebuild_con_cabecera_inconsistente(carpeta):
+    # La cabecera dice mas nodos de los que tiene el arbol: no se reemplaza el archivo ni queda el temporal
+    ruta = str(carpeta / "b.dat")
+    with BST.BSTFile.open(ruta) as b:
+        for id in range(1, 101):
+            b.insert(venta(id))
+    with open(ruta, "r+b") as f:
+        f.write(struct.pack("i", 150))
+    BST.buffer_pool.invalidate(ruta)  # escrito por fuera del pool
+    antes = open(ruta, "rb").read()
+    b = BST.BSTFile(ruta)
+    assert b.rebuild() is False
+    assert not os.path.exists(ruta + ".tmp")
+    assert open(ruta, "rb").read() == antes
+
+
+def test_abrir_un_archivo_avl_no_falla(carpeta):
+    # Lo que hacia la demo de BST sobre el ventas.dat que deja la de AVL
+    ruta = str(carpeta / "ventas.dat")
+    avl = AvlFile(ruta)
+    for id in range(1, 50):
+        avl.insert(Venta(id, "Producto", 1, 1.0, "2024-01-01"))
+    BST.BSTFile(ruta)
+    assert not os.path.exists(ruta + ".tmp")
+
+
+def test_rebuild_incrementa_la_version(carpeta):
+    ruta = str(carpeta / "b.dat")
+    b = BST.BSTFile(ruta)
+    for id in (5, 3, 8, 1):
+        b.insert(venta(id))
+    version = BST.HEADER_CODEC.unpack(open(ruta, "rb").read(BST.HEADER_SIZE))[4]
+    assert b.rebuild() is True
+    assert BST.HEADER_CODEC.unpack(open(ruta, "rb").read(BST.HEADER_SIZE))[4] == version + 1
+    assert [v.id_venta for v in b.cursor()] == [1, 3, 5, 8]
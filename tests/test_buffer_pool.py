@@ -0,0 +1,51 @@
+import pytest
+from Buffer_Pool import buffer_pool
+from AVL_File import AvlFile, Venta as VentaAvl
+from BPlusTree_File import BPlusTreeFile, Venta as VentaBp
+from Sequential_File import SequentialFile, Venta as VentaSeq
+
+
+@pytest.fixture
+def eventos():
+    trazas = []
+    buffer_pool.trace(trazas.append)
+    yield trazas
+    buffer_pool.trace(None)
+
+
+def cargar(estructura, venta, n=300):
+    for id in range(1, n + 1):
+        estructura.insert(venta(id, "Producto", 1, 1.0, "2024-01-01"))
+
+
+@pytest.mark.parametrize("crear, venta, rango", [
+    (lambda c: SequentialFile(str(c / "s.dat"), str(c / "s_aux.dat")), VentaSeq, "search_range"),
+    (lambda c: AvlFile(str(c / "a.dat")), VentaAvl, "rangeSearch"),
+    (lambda c: BPlusTreeFile(str(c / "b.dat")), VentaBp, "rangeSearch"),
+], ids=["secuencial", "avl", "bplus"])
+def test_busqueda_por_rango_es_una_operacion(carpeta, eventos, crear, venta, rango):
+    # El cursor entrega cada registro con la operacion suspendida, pero el rango completo se traza una vez
+    estructura = crear(carpeta)
+    cargar(estructura, venta)
+    eventos.clear()
+    assert len(getattr(estructura, rango)(10, 200)) == 191
+    assert len(eventos) == 1
+
+
+def test_la_traza_usa_el_nombre_de_la_operacion(carpeta, eventos):
+    avl = AvlFile(str(carpeta / "a.dat"))
+    cargar(avl, VentaAvl, 20)
+    eventos.clear()
+    avl.search(5)
+    assert [r.id for r in avl.cursor(3, 5)] == [3, 4, 5]
+    assert [e["operation"] for e in eventos] == ["AvlFile.search"] + ["AvlFile.cursor"] * 4
+
+
+def test_secuencial_cuenta_los_registros_que_desempaqueta(carpeta, eventos):
+    # Principal y cadenas del auxiliar se leen con pool.unpack_from: cada registro cuenta en unpacks
+    s = SequentialFile(str(carpeta / "s.dat"), str(carpeta / "s_aux.dat"), k=50)
+    for id in list(range(2, 202, 2)) + list(range(1, 41, 2)):
+        s.insert(VentaSeq(id, "Producto", 1, 1.0, "2024-01-01"))
+    eventos.clear()
+    assert len(s.search_range(1, 40)) == 40
+    assert eventos[0]["unpacks"] >= 40
@@ -0,0 +1,28 @@
+import pytest
+import AVL_File
+import Sequential_File
+from conftest import cargar_bst
+
+BST = cargar_bst()
+
+ESTRUCTURAS = {
+    "avl": (lambda c: AVL_File.AvlFile(str(c / "a.dat")), AVL_File.Venta,
+            lambda a: [(r.id, r.nombre.strip()) for r in a.rangeSearch(-2**31, 2**31 - 1)]),
+    "secuencial": (lambda c: Sequential_File.SequentialFile(str(c / "s.dat"), str(c / "s_aux.dat")), Sequential_File.Venta,
+                   lambda s: [(r.id, r.nombre.strip()) for r in s.search_range(-2**31, 2**31 - 1)]),
+    "bst": (lambda c: BST.BSTFile(str(c / "b.dat")), BST.Venta,
+            lambda b: [(v.id_venta, v.nombre_producto.decode().strip()) for v in b.cursor()]),
+}
+
+
+@pytest.mark.parametrize("tipo", list(ESTRUCTURAS))
+def test_carga_masiva_con_ids_repetidos(carpeta, capsys, tipo):
+    # Las tres cargas conservan la primera venta de cada id e informan las repetidas
+    crear, Venta, contenido = ESTRUCTURAS[tipo]
+    estructura = crear(carpeta)
+    capsys.readouterr()
+    estructura.bulk_load([Venta(id, nombre, 1, 1.0, "2024-01-01")
+                          for id, nombre in [(3, "A"), (1, "B"), (3, "C"), (2, "D"), (1, "E"), (3, "F")]])
+    errores = [linea for linea in capsys.readouterr().out.splitlines() if linea.startswith("Error")]
+    assert errores == ["Error: Ya existe un registro con ID : 1"] + ["Error: Ya existe un registro con ID : 3"] * 2
+    assert contenido(estructura) == [(1, "B"), (2, "D"), (3, "A")]
@@ -0,0 +1,158 @@
+import json
+import threading
+import pytest
+from AVL_File import AvlFile, Venta
+from Concurrent_File import ConcurrentFile
+from conftest import cargar_bst, terminar
+from test_modelo import ESTRUCTURAS, IDS, avl_balanceado, ejecutar
+
+BST = cargar_bst()
+
+
+def venta(id):
+    return Venta(id, "Producto", 1, 1.0, "2024-01-01")
+
+
+def test_cada_hilo_usa_su_copia_de_la_estructura(carpeta):
+    with ConcurrentFile(AvlFile.open(str(carpeta / "a.dat"))) as ventas:
+        copias = []
+        hilo = threading.Thread(target=lambda: copias.append(ventas._estructura()))
+        hilo.start()
+        hilo.join()
+        assert copias[0] is not ventas._estructura()
+        assert copias[0].pool is ventas._estructura().pool
+
+
+@pytest.mark.parametrize("crear, nueva", [
+    (lambda c: AvlFile.open(str(c / "a.dat")), venta),
+    (lambda c: BST.BSTFile.open(str(c / "b.dat")), lambda id: BST.Venta(id, "Producto", 1, 1.0, "2024-01-01")),
+], ids=["avl", "bst"])
+def test_lectores_y_escritor_en_hilos(carpeta, crear, nueva):
+    # Los lectores siempre ven un arbol ordenado y no fallan mientras el escritor inserta y borra
+    errores = []
+    with ConcurrentFile(crear(carpeta)) as ventas:
+        def escritor():
+            for id in range(1, 401):
+                ventas.insert(nueva(id))
+            for id in range(1, 401, 4):
+                ventas.remove(id)
+
+        def lector():
+            try:
+                for _ in range(60):
+                    ids = [v.id if hasattr(v, "id") else v.id_venta for v in ventas.cursor()]
+                    if ids != sorted(ids):
+                        errores.append(ids)
+                    ventas.search(200)
+            except Exception as e:  # cualquier fallo en el hilo se informa en el test
+                errores.append(e)
+
+        hilos = [threading.Thread(target=escritor)] + [threading.Thread(target=lector) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert errores == []
+        quedan = [v.id if hasattr(v, "id") else v.id_venta for v in ventas.cursor()]
+        assert quedan == [id for id in range(1, 401) if id % 4 != 1]
+
+
+def test_escribir_dentro_de_un_cursor_falla_en_vez_de_bloquearse(carpeta):
+    with ConcurrentFile(AvlFile.open(str(carpeta / "a.dat"))) as ventas:
+        for id in range(1, 11):
+            ventas.insert(venta(id))
+        cursor = ventas.cursor()
+        next(cursor)
+        with pytest.raises(RuntimeError):
+            ventas.insert(venta(11))
+        cursor.close()
+        ventas.insert(venta(11))
+        assert ventas.search(11).id == 11
+
+
+def test_lectura_anidada_con_un_escritor_esperando(carpeta):
+    # El hilo que recorre un cursor vuelve a leer mientras otro espera para escribir: no hay interbloqueo
+    with ConcurrentFile(AvlFile.open(str(carpeta / "a.dat"))) as ventas:
+        for id in range(1, 11):
+            ventas.insert(venta(id))
+        cursor = ventas.cursor()
+        next(cursor)
+        escritor = threading.Thread(target=lambda: ventas.insert(venta(11)))
+        escritor.start()
+        while not ventas.lock.waiting:
+            escritor.join(0.01)
+        hecho = []
+        lector = threading.Thread(target=lambda: hecho.append(ventas.search(5)))
+        lector.start()
+        lector.join(0.2)
+        assert not hecho  # un lector nuevo cede el paso al escritor
+        assert ventas.search(3).id == 3
+        cursor.close()
+        escritor.join(5)
+        lector.join(5)
+        assert not escritor.is_alive() and hecho[0].id == 5
+        assert ventas.search(11).id == 11
+
+
+@pytest.mark.parametrize("tipo", ["avl", "bst", "secuencial", "bplus", "hash"])
+def test_escritor_contra_un_dict_con_lectores_en_hilos(carpeta, tipo):
+    # Un hilo aplica la secuencia aleatoria del modelo a traves de ConcurrentFile mientras otros leen
+    modelo = ESTRUCTURAS[tipo](carpeta)
+    modelo.estructura = ConcurrentFile(modelo.estructura)
+    errores, terminado = [], threading.Event()
+
+    def escritor():
+        try:
+            ejecutar(modelo, 11, pasos=400)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            terminado.set()
+
+    def lector():
+        try:
+            while not terminado.is_set():
+                ids = modelo.range(IDS[0], IDS[-1])
+                if ids != sorted(set(ids)):
+                    errores.append(ids)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=escritor)] + [threading.Thread(target=lector) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    modelo.estructura.close()
+    assert errores == []
+
+
+ESCRITOR = """
+import json, random
+from AVL_File import AvlFile, Venta
+from Concurrent_File import ConcurrentFile
+rnd = random.Random({paridad})
+esperado = set()
+with ConcurrentFile(AvlFile.open({ruta!r})) as avl:
+    for _ in range(300):
+        id = rnd.randrange(200) * 2 + {paridad}
+        if rnd.random() < 0.3:
+            avl.remove(id)
+            esperado.discard(id)
+        elif id not in esperado:
+            avl.insert(Venta(id, 'Producto', 1, 1.0, '2024-01-01'))
+            esperado.add(id)
+        assert (avl.search(id) is not None) == (id in esperado)
+print(json.dumps(sorted(esperado)))
+"""
+
+
+def test_dos_procesos_escriben_el_mismo_arbol(carpeta, otro_proceso):
+    # Dos procesos insertan y borran ids de distinta paridad a la vez; el arbol final es la union
+    ruta = str(carpeta / "a.dat")
+    AvlFile(ruta)
+    procesos = [otro_proceso(ESCRITOR.format(ruta=ruta, paridad=paridad), esperar=False) for paridad in (0, 1)]
+    esperado = sorted(id for proceso in procesos for id in json.loads(terminar(proceso).splitlines()[-1]))
+    avl = AvlFile(ruta, nuevo=False)
+    assert [r.id for r in avl.rangeSearch(-2**31, 2**31 - 1)] == esperado
+    avl_balanceado(avl)
@@ -0,0 +1,45 @@
+# Dos procesos sobre el mismo archivo, uno despues del otro y sin Concurrent_File: la cabecera en
+# memoria y las paginas en cache de uno no deben ocultar lo que escribio el otro
+from AVL_File import AvlFile, Venta
+from conftest import cargar_bst
+
+
+def test_avl_ve_la_insercion_de_otro_proceso(carpeta, otro_proceso):
+    ruta = str(carpeta / "x.dat")
+    a = AvlFile(ruta)
+    a.insert(Venta(1, "A", 1, 1.0, "2024-01-01"))
+    assert a.search(1) is not None
+    otro_proceso("from AVL_File import AvlFile, Venta\n"
+                 "AvlFile('x.dat', nuevo=False).insert(Venta(2, 'B', 1, 1.0, '2024-01-01'))")
+    assert a.search(2) is not None
+    assert a.getCountRegister() == 2
+    assert AvlFile(ruta, nuevo=False).search(2) is not None
+    a.insert(Venta(3, "C", 1, 1.0, "2024-01-01"))
+    salida = otro_proceso("from AVL_File import AvlFile\n"
+                          "print([r.id for r in AvlFile('x.dat', nuevo=False).rangeSearch(0, 10)])")
+    assert salida.strip() == "[1, 2, 3]"
+
+
+def test_avl_ve_la_carga_masiva_de_otro_proceso(carpeta, otro_proceso):
+    ruta = str(carpeta / "x.dat")
+    a = AvlFile(ruta)
+    a.insert(Venta(1, "A", 1, 1.0, "2024-01-01"))
+    assert a.search(1) is not None
+    otro_proceso("from AVL_File import AvlFile, Venta\n"
+                 "AvlFile('x.dat', nuevo=False).bulk_load([Venta(5, 'B', 1, 1.0, '2024-01-01')])")
+    assert [r.id for r in a.rangeSearch(0, 10)] == [5]
+
+
+def test_bst_ve_la_insercion_de_otro_proceso(carpeta, otro_proceso):
+    ruta = str(carpeta / "x.dat")
+    BST = cargar_bst()
+    b = BST.BSTFile(ruta)
+    b.insert(BST.Venta(5, "A", 1, 1.0, "2024-01-01"))
+    assert b.search(5) is not None
+    otro_proceso("BST = cargar_bst()\n"
+                 "BST.BSTFile('x.dat').insert(BST.Venta(3, 'B', 1, 1.0, '2024-01-01'))")
+    assert b.search(3) is not None
+    b.insert(BST.Venta(7, "C", 1, 1.0, "2024-01-01"))
+    salida = otro_proceso("BST = cargar_bst()\n"
+                          "print([v.id_venta for v in BST.BSTFile('x.dat').cursor()])")
+    assert salida.strip() == "[3, 5, 7]"
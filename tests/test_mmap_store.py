@@ -0,0 +1,43 @@
+import os
+from AVL_File import AvlFile, BaseFile, Venta
+from Mmap_Store import MmapStore
+
+
+def venta(id):
+    return Venta(id, "Producto", 1, 1.0, "2024-01-01")
+
+
+def test_el_mapa_se_conserva_entre_operaciones(carpeta):
+    store = MmapStore()
+    ruta = str(carpeta / "a.dat")
+    avl = AvlFile(ruta, pool=store)
+    for id in range(1, 2001):
+        avl.insert(venta(id))
+    assert store.stats()["remaps"] < 20  # solo al crecer, no en cada operacion
+    assert avl.search(1500).id == 1500
+    store.close()
+    assert os.path.getsize(ruta) == BaseFile.HEADER_SIZE + 2000 * Venta.SIZE
+
+
+def test_cerrar_la_sesion_recorta_el_archivo(carpeta):
+    store = MmapStore()
+    ruta = str(carpeta / "a.dat")
+    with AvlFile.open(ruta, pool=store) as avl:
+        for id in range(1, 101):
+            avl.insert(venta(id))
+    assert os.path.getsize(ruta) == BaseFile.HEADER_SIZE + 100 * Venta.SIZE
+    assert store.stats()["files"] == 0
+
+
+def test_ve_el_archivo_extendido_por_otro_almacen(carpeta):
+    # Otro almacen (como otro proceso) agranda el archivo: el mapa se rehace en la siguiente operacion
+    ruta = str(carpeta / "a.dat")
+    uno, otro = MmapStore(), MmapStore()
+    a = AvlFile(ruta, pool=uno)
+    a.insert(venta(1))
+    b = AvlFile(ruta, nuevo=False, pool=otro)
+    for id in range(2, 3001):
+        b.insert(venta(id))
+    otro.close()
+    assert a.search(2999).id == 2999
+    assert len(a.getAllRecords()) == 3000
@@ -0,0 +1,167 @@
+import random
+import pytest
+import AVL_File
+import BPlusTree_File
+import Extendible_Hash_File
+import Sequential_File
+from Secondary_Index import IndexedFile
+from conftest import cargar_bst
+
+BST = cargar_bst()
+
+# Pruebas basadas en un modelo: cada estructura recibe una secuencia aleatoria de inserciones,
+# eliminaciones, busquedas y rangos, y tras cada paso debe responder lo mismo que un dict
+IDS = range(0, 400)
+PASOS = 700
+
+
+def nombre(id):
+    return f"Producto {id % 7}"
+
+
+def fecha(id):
+    return f"2024-{id % 12 + 1:02d}-{id % 28 + 1:02d}"
+
+
+class Modelo:
+    # Adaptador comun: cada estructura nombra distinto sus operaciones y el id de la venta
+    def __init__(self, estructura, venta, insertar, eliminar, buscar, rango, ident=lambda v: v.id):
+        self.estructura = estructura
+        self.venta = venta
+        self.insertar = insertar
+        self.eliminar = eliminar
+        self.buscar = buscar
+        self.rango = rango
+        self.ident = ident
+
+    def insert(self, id):
+        self.insertar(self.estructura, self.venta(id, nombre(id), id % 5, float(id), fecha(id)))
+
+    def delete(self, id):
+        self.eliminar(self.estructura, id)
+
+    def search(self, id):
+        venta = self.buscar(self.estructura, id)
+        return None if venta is None else self.ident(venta)
+
+    def range(self, lo, hi):
+        return [self.ident(venta) for venta in self.rango(self.estructura, lo, hi)]
+
+
+ESTRUCTURAS = {
+    "secuencial": lambda c: Modelo(Sequential_File.SequentialFile(str(c / "s.dat"), str(c / "s.aux"), k=5),
+                                   Sequential_File.Venta, lambda s, v: s.insert(v), lambda s, id: s.delete(id),
+                                   lambda s, id: s.search(id), lambda s, lo, hi: s.search_range(lo, hi)),
+    "secuencial_log2": lambda c: Modelo(Sequential_File.SequentialFile(str(c / "s.dat"), str(c / "s.aux"), k=5,
+                                                                       fraction=0),
+                                        Sequential_File.Venta, lambda s, v: s.insert(v), lambda s, id: s.delete(id),
+                                        lambda s, id: s.search(id), lambda s, lo, hi: s.search_range(lo, hi)),
+    "avl": lambda c: Modelo(AVL_File.AvlFile(str(c / "a.dat")), AVL_File.Venta,
+                            lambda a, v: a.insert(v), lambda a, id: a.remove(id),
+                            lambda a, id: a.search(id), lambda a, lo, hi: a.rangeSearch(lo, hi)),
+    "bst": lambda c: Modelo(BST.BSTFile(str(c / "b.dat")), BST.Venta,
+                            lambda b, v: b.insert(v), lambda b, id: b.remove(id),
+                            lambda b, id: b.search(id), lambda b, lo, hi: b.cursor(lo, hi),
+                            ident=lambda v: v.id_venta),
+    "bplus": lambda c: Modelo(BPlusTree_File.BPlusTreeFile(str(c / "p.dat")), BPlusTree_File.Venta,
+                              lambda p, v: p.insert(v), lambda p, id: p.remove(id),
+                              lambda p, id: p.search(id), lambda p, lo, hi: p.rangeSearch(lo, hi)),
+    "hash": lambda c: Modelo(Extendible_Hash_File.ExtendibleHashFile(str(c / "h.dat")), BPlusTree_File.Venta,
+                             lambda h, v: h.insert(v), lambda h, id: h.remove(id), lambda h, id: h.search(id),
+                             lambda h, lo, hi: sorted((v for v in h.getAllRecords() if lo <= v.id <= hi),
+                                                      key=lambda v: v.id)),
+}
+
+
+def avl_balanceado(avl):
+    # Orden de busqueda, factores de balance guardados y |balance| <= 1 en todo el arbol
+    def altura(posicion, lo, hi):
+        if posicion == -1:
+            return 0
+        nodo = avl.getRecord(posicion)
+        assert lo < nodo.id < hi
+        izquierda, derecha = altura(nodo.left, lo, nodo.id), altura(nodo.right, nodo.id, hi)
+        assert nodo.balanceFactor == derecha - izquierda and abs(derecha - izquierda) <= 1
+        return 1 + max(izquierda, derecha)
+    return altura(avl.getIndexHead(), float("-inf"), float("inf"))
+
+
+def ejecutar(modelo, semilla, pasos=PASOS, borrar=0.3, verificar=None, esperado=None):
+    rnd = random.Random(semilla)
+    esperado = dict.fromkeys(esperado or ())
+    for paso in range(pasos):
+        id = rnd.choice(IDS)
+        accion = rnd.random()
+        if accion < borrar:
+            modelo.delete(id)
+            esperado.pop(id, None)
+        elif accion < 0.75:
+            if id not in esperado:  # BSTFile admite ids repetidos: solo se insertan ids nuevos
+                modelo.insert(id)
+                esperado[id] = None
+        elif accion < 0.9:
+            assert modelo.search(id) == (id if id in esperado else None), (paso, id)
+        else:
+            lo = rnd.choice(IDS)
+            hi = lo + rnd.randrange(60)
+            assert modelo.range(lo, hi) == sorted(i for i in esperado if lo <= i <= hi), (paso, lo, hi)
+        if verificar is not None and paso % 50 == 0:
+            verificar(modelo.estructura)
+    assert modelo.range(IDS[0], IDS[-1]) == sorted(esperado)
+    return esperado
+
+
+@pytest.mark.parametrize("semilla", [1, 2])
+@pytest.mark.parametrize("tipo", list(ESTRUCTURAS))
+def test_estructura_contra_un_dict(carpeta, tipo, semilla):
+    ejecutar(ESTRUCTURAS[tipo](carpeta), semilla)
+
+
+@pytest.mark.parametrize("semilla", [3, 4])
+def test_avl_se_mantiene_balanceado_al_borrar(carpeta, semilla):
+    # Muchas eliminaciones: cada rotacion de remove debe dejar alturas y factores correctos
+    modelo = ESTRUCTURAS["avl"](carpeta)
+    ejecutar(modelo, semilla, pasos=1200, borrar=0.5, verificar=avl_balanceado)
+    avl_balanceado(modelo.estructura)
+
+
+def test_bst_compacta_y_sigue_igual_al_modelo(carpeta, monkeypatch):
+    # Al borrar la mayoria de los nodos se compacta el archivo y el contenido no cambia
+    modelo = ESTRUCTURAS["bst"](carpeta)
+    compactaciones = []
+    rebuild = modelo.estructura.rebuild
+    monkeypatch.setattr(modelo.estructura, "rebuild", lambda: compactaciones.append(1) or rebuild())
+    for id in IDS:
+        modelo.insert(id)
+    quedan = set(IDS)
+    for id in random.Random(5).sample(list(IDS), 300):
+        modelo.delete(id)
+        quedan.discard(id)
+        assert modelo.search(id) is None
+    assert compactaciones
+    count, altura, _, libres = modelo.estructura._header()
+    assert count - libres == len(quedan) and altura <= BST.altura_maxima(len(quedan))
+    assert modelo.range(IDS[0], IDS[-1]) == sorted(quedan)
+    ejecutar(modelo, 6, pasos=300, esperado=quedan)
+
+
+@pytest.mark.parametrize("base", ["avl", "secuencial"])
+def test_indices_secundarios_contra_un_dict(carpeta, base):
+    modelo = ESTRUCTURAS[base](carpeta)
+    ventas = IndexedFile(modelo.estructura, str(carpeta / "ventas"), nuevo=True)
+    rnd = random.Random(8)
+    esperado = {}
+    for _ in range(500):
+        id = rnd.choice(IDS)
+        if rnd.random() < 0.35:
+            assert ventas.remove(id) == (id in esperado)
+            esperado.pop(id, None)
+        elif id not in esperado:
+            assert ventas.insert(modelo.venta(id, nombre(id), 1, 1.0, fecha(id)))
+            esperado[id] = True
+    for n in range(7):
+        assert sorted(v.id for v in ventas.search_by_name(f"Producto {n}")) == \
+            sorted(id for id in esperado if nombre(id) == f"Producto {n}")
+    for desde, hasta in [("2024-01-01", "2024-03-15"), ("2024-06-10", "2024-06-20"), ("2024-11-30", "2024-12-31")]:
+        assert sorted(v.id for v in ventas.range_by_date(desde, hasta)) == \
+            sorted(id for id in esperado if desde <= fecha(id) <= hasta)
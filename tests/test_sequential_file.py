@@ -0,0 +1,68 @@
+import random
+import pytest
+from Sequential_File import SequentialFile, Venta
+
+
+def venta(id):
+    return Venta(id, "Producto", 1, 1.0, "2024-01-01")
+
+
+def abrir(carpeta, **opciones):
+    return SequentialFile(str(carpeta / "s.dat"), str(carpeta / "s_aux.dat"), **opciones)
+
+
+def contar_reconstrucciones(s, monkeypatch):
+    reconstrucciones = []
+    rebuild = s.rebuild
+    monkeypatch.setattr(s, "rebuild", lambda: reconstrucciones.append(1) or rebuild())
+    return reconstrucciones
+
+
+def test_inserciones_descendentes_usan_la_cadena_inicial(carpeta, monkeypatch):
+    # Ids menores al primero del principal van a la cadena inicial; solo se reconstruye al llenarse el auxiliar
+    s = abrir(carpeta)
+    reconstrucciones = contar_reconstrucciones(s, monkeypatch)
+    ids = list(range(500, 0, -1))
+    for id in ids:
+        assert s.insert(venta(id))
+    assert len(reconstrucciones) <= len(ids) // s.k
+    assert [r.id for r in s.search_range(1, 500)] == sorted(ids)
+    assert s.insert(venta(ids[-1])) is False
+
+
+def test_cadena_inicial_busqueda_rango_y_borrado(carpeta):
+    s = abrir(carpeta)
+    for id in (50, 60, 40, 10, 30, 20):
+        s.insert(venta(id))
+    assert [r.id for r in s.search_range(0, 100)] == [10, 20, 30, 40, 50, 60]
+    assert [r.id for r in s.cursor(15, limit=3)] == [20, 30, 40]
+    assert s.search(20).id == 20 and s.search(25) is None
+    assert [r and r.id for r in s.search_many([30, 5, 60, 10])] == [30, None, 60, 10]
+    assert s.delete(20) and s.search(20) is None
+    assert not s.delete(20)
+    assert s.insert(venta(20)) and s.search(20).id == 20
+    s.rebuild()
+    assert [r.id for r in s.search_range(0, 100)] == [10, 20, 30, 40, 50, 60]
+
+
+@pytest.mark.parametrize("fraction", [0.05, 0.0], ids=["fraccion", "log2"])
+def test_politicas_del_auxiliar(carpeta, monkeypatch, fraction):
+    # Ambas politicas mantienen el archivo correcto; la fraccional reconstruye O(log n) veces en total
+    s = abrir(carpeta, fraction=fraction)
+    reconstrucciones = contar_reconstrucciones(s, monkeypatch)
+    ids = list(range(1, 3001))
+    random.Random(7).shuffle(ids)
+    for id in ids:
+        assert s.insert(venta(id))
+    assert [r.id for r in s.search_range(1, 3000)] == sorted(ids)
+    if fraction:
+        assert len(reconstrucciones) < 100
+    else:
+        assert len(reconstrucciones) > 150
+
+
+def test_la_politica_persistida_manda(carpeta):
+    abrir(carpeta, k=7, fraction=0.2)
+    s = abrir(carpeta)
+    assert (s.k, s.fraction) == (7, pytest.approx(0.2))
+    assert abrir(carpeta, fraction=0.0).fraction == pytest.approx(0.2)
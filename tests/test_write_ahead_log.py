@@ -0,0 +1,63 @@
+import json
+import random
+import pytest
+
+# Cada caida ocurre en otro proceso (os._exit a mitad de la escritura de las paginas en los archivos de
+# datos, despues del fsync del log); otro proceso reproduce el log y compara el arbol con lo insertado
+INSERTAR = """
+import os, random
+from Buffer_Pool import buffer_pool
+from Write_Ahead_Log import WriteAheadLog
+from AVL_File import AvlFile, Venta
+buffer_pool.use_wal(WriteAheadLog('x.wal', group_size={grupo}))
+avl = AvlFile.open({ruta!r})
+escribir = buffer_pool._write_page
+escritas = [0]
+def caida(key, page):
+    escritas[0] += 1
+    if escritas[0] == {corte}:
+        os._exit(0)
+    escribir(key, page)
+buffer_pool._write_page = caida
+for id in random.Random({semilla}).sample(range(10 ** 6), {n}):
+    avl.insert(Venta(id, 'Producto', 1, 1.0, '2024-01-01'))
+os._exit(0)
+"""
+
+RECUPERAR = """
+import json
+from Buffer_Pool import buffer_pool
+from Write_Ahead_Log import WriteAheadLog
+from AVL_File import AvlFile
+log = WriteAheadLog('x.wal')
+buffer_pool.use_wal(log)
+avl = AvlFile({ruta!r}, nuevo=False)
+def altura(posicion, lo, hi):
+    if posicion == -1:
+        return 0
+    nodo = avl.getRecord(posicion)
+    assert lo < nodo.id < hi
+    izquierda, derecha = altura(nodo.left, lo, nodo.id), altura(nodo.right, nodo.id, hi)
+    assert nodo.balanceFactor == derecha - izquierda and abs(derecha - izquierda) <= 1
+    return 1 + max(izquierda, derecha)
+altura(avl.getIndexHead(), float('-inf'), float('inf'))
+print(json.dumps([r.id for r in avl.rangeSearch(-2 ** 31, 2 ** 31 - 1)]))
+"""
+
+
+@pytest.mark.parametrize("corte", [3, 17, 60])
+def test_caida_durante_la_escritura_de_paginas(carpeta, otro_proceso, corte):
+    ruta, grupo, n = str(carpeta / "x.dat"), 40, 300
+    otro_proceso(INSERTAR.format(ruta=ruta, grupo=grupo, corte=corte, semilla=corte, n=n))
+    recuperados = json.loads(otro_proceso(RECUPERAR.format(ruta=ruta)))
+    insertados = random.Random(corte).sample(range(10 ** 6), n)
+    # Quedan exactamente los grupos confirmados: un prefijo de las inserciones, en grupos completos
+    assert len(recuperados) % grupo == 0 and len(recuperados) > 0
+    assert recuperados == sorted(insertados[:len(recuperados)])
+
+
+def test_caida_sin_escribir_paginas_pierde_solo_el_grupo_abierto(carpeta, otro_proceso):
+    ruta = str(carpeta / "x.dat")
+    otro_proceso(INSERTAR.format(ruta=ruta, grupo=50, corte=10 ** 9, semilla=9, n=230))
+    recuperados = json.loads(otro_proceso(RECUPERAR.format(ruta=ruta)))
+    assert recuperados == sorted(random.Random(9).sample(range(10 ** 6), 230)[:200])